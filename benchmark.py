@@ -0,0 +1,111 @@
+import argparse, random, sys, tracemalloc
+
+from headless import HeadlessGame
+
+# Returns every entity of the world, including the facades of the locations
+def get_world_entities(entities):
+	world_entities = []
+	world_entities.extend(entities.locations)
+	world_entities.extend(location.facade for location in entities.locations)
+	world_entities.extend(entities.items)
+	world_entities.extend(entities.characters)
+	world_entities.extend(entities.map_elements)
+
+	return world_entities
+
+# Returns the size of the entity object and its attribute dictionary
+# if it has one: bytes
+def get_entity_size(entity):
+	size = sys.getsizeof(entity)
+	if hasattr(entity, '__dict__'):
+		size += sys.getsizeof(entity.__dict__)
+	return size
+
+# Returns the names of the slots declared by the class and its bases
+def get_slot_names(entity_class):
+	names = []
+	for base in reversed(entity_class.__mro__):
+		slots = base.__dict__.get('__slots__', ())
+		if isinstance(slots, str):
+			slots = (slots,)
+		names.extend(name for name in slots if name not in names)
+
+	return names
+
+# Returns the size the entity would take if its class did not declare
+# __slots__, i.e. an object holding the same attributes in its __dict__
+# Objects of the same class share one stand-in class, so that their
+# dictionaries share keys like instances of the original class would
+# Parameter: stand-in class of each entity class <type, type>: bytes
+def get_unslotted_size(entity, unslotted_classes):
+	entity_class = type(entity)
+	unslotted_class = unslotted_classes.get(entity_class)
+	if unslotted_class == None:
+		unslotted_class = type(entity_class.__name__, (), {})
+		unslotted_classes[entity_class] = unslotted_class
+
+	unslotted = unslotted_class()
+	for name in get_slot_names(entity_class):
+		if hasattr(entity, name):
+			setattr(unslotted, name, getattr(entity, name))
+
+	return get_entity_size(unslotted)
+
+# Returns the number of entities of each class in the world, with the bytes
+# they take and would take without __slots__
+# <str, [int, int, int]>
+def measure_classes(world_entities):
+	unslotted_classes = {}
+	classes = {}
+	for entity in world_entities:
+		sizes = classes.setdefault(type(entity).__name__, [0, 0, 0])
+		sizes[0] += 1
+		sizes[1] += get_entity_size(entity)
+		sizes[2] += get_unslotted_size(entity, unslotted_classes)
+
+	return classes
+
+# Creates a world and returns its entity count, the bytes taken by the
+# entity objects themselves, and the bytes allocated while creating it
+def measure_memory(num_neighborhoods):
+	tracemalloc.start()
+	game = HeadlessGame(1000, 100, 70, num_neighborhoods)
+	allocated, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	world_entities = get_world_entities(game.entities)
+	entity_bytes = sum(get_entity_size(entity) for entity in world_entities)
+
+	return len(world_entities), entity_bytes, allocated,\
+		measure_classes(world_entities)
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(
+		description='Measures the memory taken by the entities of a world')
+	parser.add_argument('--neighborhoods', type=int, default=50,
+		help='number of neighborhoods in the world')
+	parser.add_argument('--seed', type=int, default=1,
+		help='random seed for a reproducible world')
+	args = parser.parse_args()
+
+	random.seed(args.seed)
+
+	num_entities, entity_bytes, allocated, classes\
+		= measure_memory(args.neighborhoods)
+
+	print('Entities: ' + str(num_entities))
+	print('Entity objects: ' + str(entity_bytes) + ' bytes ('
+		+ str(round(entity_bytes / num_entities, 1)) + ' bytes / entity)')
+	print('World creation: ' + str(allocated) + ' bytes allocated ('
+		+ str(round(allocated / num_entities, 1)) + ' bytes / entity)')
+
+	# Baseline: the same attributes in a __dict__ instead of __slots__
+	unslotted_bytes = sum(sizes[2] for sizes in classes.values())
+	print('Without __slots__: ' + str(unslotted_bytes) + ' bytes ('
+		+ str(round(unslotted_bytes / num_entities, 1)) + ' bytes / entity)')
+	print()
+	print('Class: entities, bytes / entity with __slots__ -> with __dict__')
+	for name, (count, slotted, unslotted) in sorted(classes.items()):
+		print(name + ': ' + str(count) + ', '
+			+ str(round(slotted / count, 1)) + ' -> '
+			+ str(round(unslotted / count, 1)))
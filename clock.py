@@ -0,0 +1,86 @@
+import time
+
+# Simulation clocks
+# The game loop ticks the clock once per update and every time-dependent
+# entity reads the sampled time with get_ticks(), so the simulation never
+# asks SDL (or the OS) for the time more than once per tick
+
+class Clock:
+	def __init__(self):
+		# Simulation time sampled on the last tick: ms
+		self.ticks = 0
+
+		# Game time skipped by working and sleeping, which the simulation
+		# jumps over instead of ticking through: ms
+		self.skipped_ticks = 0
+
+	# Abstract method:
+	# Advances the clock and returns the new simulation time: ms
+	def tick(self):
+		pass
+
+	# Returns the simulation time sampled on the last tick: ms
+	def get_ticks(self):
+		return self.ticks
+
+	# Adds game time that passes without being simulated: ms
+	def skip(self, time):
+		self.skipped_ticks += time
+
+	# Returns the simulation time plus the skipped time, for things that
+	# change with the game time even while it is skipped: ms
+	def get_elapsed_ticks(self):
+		return self.ticks + self.skipped_ticks
+
+# Follows the wall clock, optionally sped up or slowed down
+class RealTimeClock(Clock):
+	def __init__(self, time_scale = 1.0):
+		Clock.__init__(self)
+
+		# Simulation ms per real ms
+		self.time_scale = time_scale
+
+		# Wall clock time when the clock was created: s
+		self.start_time = time.perf_counter()
+
+	def tick(self):
+		self.ticks = int((time.perf_counter() - self.start_time)
+			* 1000.0 * self.time_scale)
+		return self.ticks
+
+# Advances by exactly one step each tick, waiting when necessary so that
+# the simulation does not run ahead of real time
+class FixedStepClock(Clock):
+	# Default step length, 60 updates per second
+	default_step = 1000.0 / 60.0 # ms
+
+	def __init__(self, step = default_step):
+		Clock.__init__(self)
+
+		# Simulation time added each tick: ms
+		self.step = step
+
+		# Exact simulation time, ticks is rounded down to whole ms
+		self.exact_ticks = 0.0
+
+		# Wall clock time when the clock was created: s
+		self.start_time = time.perf_counter()
+
+	def tick(self):
+		self.exact_ticks += self.step
+		self.ticks = int(self.exact_ticks)
+		self.wait()
+		return self.ticks
+
+	# Sleeps until real time catches up with the simulation time
+	def wait(self):
+		ahead = self.exact_ticks / 1000.0\
+			- (time.perf_counter() - self.start_time)
+		if ahead > 0:
+			time.sleep(ahead)
+
+# Same as FixedStepClock, but never waits so that the simulation runs
+# as fast as the machine allows (headless runs, tests, benchmarks)
+class UnthrottledClock(FixedStepClock):
+	def wait(self):
+		pass
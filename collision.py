@@ -0,0 +1,51 @@
+# Batch collision tests of one rectangle against many
+# The coordinates of the rectangles are cached in lists, so that testing
+# a rectangle against a range of them compares the cached edges directly
+# instead of making a check_collision_directly() call per entity
+#
+# The cache is not updated when the entities move, call refresh() after
+# moving them
+
+class RectArray:
+	def __init__(self, entities):
+		# Entities in the order they were given, indices refer to this order
+		self.entities = list(entities)
+
+		# Edges of the entities' rectangles: px
+		self.lefts = []
+		self.tops = []
+		self.rights = []
+		self.bottoms = []
+
+		self.refresh()
+
+	# Caches the current coordinates and dimensions of the entities
+	def refresh(self):
+		self.lefts = [entity.x for entity in self.entities]
+		self.tops = [entity.y for entity in self.entities]
+		self.rights = [entity.x + entity.width for entity in self.entities]
+		self.bottoms = [entity.y + entity.height for entity in self.entities]
+
+	# Returns list of indices of the entities between start (inclusive)
+	# and end (exclusive) whose rectangle overlaps the parameter rectangle,
+	# in increasing order
+	def query_indices(self, x, y, width, height, start = 0, end = None):
+		if end == None:
+			end = len(self.entities)
+
+		# Same comparisons as Entity.check_collision_directly()
+		right = x + width
+		bottom = y + height
+		return [index for index in range(start, end)
+			if self.bottoms[index] > y and self.tops[index] < bottom
+			and self.rights[index] > x and self.lefts[index] < right]
+
+	# Returns list of entities whose rectangle overlaps the parameter
+	# rectangle, in the order they were given
+	def query(self, x, y, width, height):
+		return [self.entities[index]
+			for index in self.query_indices(x, y, width, height)]
+
+	# Returns the number of entities in the array
+	def __len__(self):
+		return len(self.entities)
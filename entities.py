@@ -1,4 +1,4 @@
-import sdl2, math, random
+import math, random
 
 from enums import (
 	TextureType,
@@ -15,6 +15,7 @@ from locations import (
 	House,
 	GroceryStore,
 	GasStation,
+	AbstractStore,
 	Road,
 	Sidewalk,
 	Counter,
@@ -40,7 +41,21 @@ from factories import (
 	MapElementFactory
 )
 from player import Player
-from npcs import Character, Pet, Civilian
+from npcs import (
+	Character,
+	Pet,
+	Civilian,
+	CivilianRecord,
+	Shopper,
+	Stocker,
+	StateGroup
+)
+from entity import Entity
+from clock import RealTimeClock
+from spatial import SpatialHash, StaticTree
+from scheduler import Scheduler
+from transmission import Transmission
+from population import Population
 
 # Contains all entities
 class Entities:
@@ -53,6 +68,23 @@ class Entities:
 		self.characters = []
 		self.map_elements = []
 
+		# Items and characters removed since the last compaction
+		# Dictionaries are used as ordered sets
+		# <Item, None>, <Character, None>
+		self.removed_items = {}
+		self.removed_characters = {}
+
+		# Spatial hashes of the items and characters
+		# for finding the ones near a position
+		self.item_grid = SpatialHash()
+		self.character_grid = SpatialHash()
+
+		# Trees of the locations and map elements, which never move,
+		# built by build_static_trees() once the world is created
+		self.location_tree = StaticTree([])
+		self.map_element_tree = StaticTree([])
+
+
 		# Factories
 		self.character_factory = CharacterFactory()
 		self.location_factory = LocationFactory()
@@ -62,6 +94,14 @@ class Entities:
 
 		self.map_rectangle = (0, 0, 0, 0)
 
+		# Houses of each neighborhood
+		# [[House]]
+		self.neighborhoods = []
+
+		# Textures of the world, set when the world is created so that
+		# entities can be added during the simulation
+		self.textures = None
+
 	# Add Methods:
 
 	# Creates and adds new location of parameter type
@@ -74,23 +114,21 @@ class Entities:
 	def add_item(self, type, x, y, textures):
 		item = self.item_factory.create(type, x, y, textures)
 		self.items.append(item)
+		self.item_grid.insert(item)
 		return item
 
 	# Creates and adds new supply of parameter type
 	def add_supply(self, type, x, y, textures):
 		supply = self.supply_factory.create(type, x, y, textures)
-
-		# Determine the price for the supply
-		# TO DO: pass difficulty to this function
-		supply.generate_price(1.0)
-
 		self.items.append(supply)
+		self.item_grid.insert(supply)
 		return supply
 
 	# Creates and adds new character of parameter type
 	def add_character(self, type, x, y, name, textures):
 		character = self.character_factory.create(type, x, y, name, textures)
 		self.characters.append(character)
+		self.character_grid.insert(character)
 		return character
 
 	# Creates and adds new map element of parameter type
@@ -100,12 +138,69 @@ class Entities:
 		self.map_elements.append(map_element)
 		return map_element
 
+	# Remove Methods:
+	# The entity is flagged right away, but stays in the containers
+	# until the next compaction so that loops over them are not disturbed
+
+	# Removes the item from the game
+	def remove_item(self, item):
+		if item in self.removed_items:
+			return
+
+		item.removed = True
+		item.generation += 1
+		self.removed_items[item] = None
+
+		# Supply was paid for or taken out of the store
+		if item.type == ItemType.SUPPLY and item.store != None:
+			item.store.ledger.move(item.supply, item.store.ledger.carts, None)
+			item.store = None
+
+	# Removes the character from the game
+	def remove_character(self, character):
+		if character in self.removed_characters:
+			return
+
+		character.removed = True
+		character.generation += 1
+		self.removed_characters[character] = None
+
+		# Removed characters are no longer counted in any state
+		character.set_state(None)
+
+	# Takes the removed items and characters out of the containers
+	# Keeps the order of the remaining ones
+	def compact(self):
+		if len(self.removed_items) > 0:
+			self.items = [item for item in self.items
+				if item not in self.removed_items]
+			for item in self.removed_items:
+				self.item_grid.remove(item)
+				if item.type == ItemType.SUPPLY:
+					self.supply_factory.release(item)
+			self.removed_items.clear()
+
+		if len(self.removed_characters) > 0:
+			self.characters = [character for character in self.characters
+				if character not in self.removed_characters]
+			for character in self.removed_characters:
+				self.character_grid.remove(character)
+				self.character_factory.release(character)
+			self.removed_characters.clear()
+
+	# Indexes the current locations and map elements
+	# Locations and map elements added later are not found by the trees
+	def build_static_trees(self):
+		self.location_tree = StaticTree(self.locations)
+		self.map_element_tree = StaticTree(self.map_elements)
+
 	# Various Methods:
 
 	# Initialize player's starting position/meters and set texture
 	def init_player(self, x, y, texture, money, health, morale):
 		self.player.x = x
 		self.player.y = y
+		self.player.reset_interpolation()
 
 		self.player.texture = texture
 
@@ -122,7 +217,44 @@ class Controller:
 	morale_decrease_interval = game_day_length / 4
 	health_decrease_interval = game_day_length / 78
 
-	def __init__(self):
+	# Bounds of the time between shoppers generated for a store
+	min_shopper_generation_interval = 3000 # ms
+	max_shopper_generation_interval = 18000 # ms
+
+	# Average time a stocker takes to place a supply on a shelf,
+	# including the way to the aisle and back
+	stocker_placing_interval = 10000 # ms
+
+	# Distance from the player within which the shoppers and stockers
+	# of a store are simulated in detail
+	# Leaves time to switch to detail before a driving player arrives
+	detail_distance = 2000 # px
+
+	# Interval between updates of the stores that are not simulated
+	# in detail, which also checks which stores the player is near
+	abstract_update_interval = 1000 # ms
+
+	# Interval between spreads of the infection between civilians
+	transmission_interval = 500 # ms
+
+	# Interval between updates of the neighborhoods' population,
+	# one game hour
+	population_update_interval = game_day_length / 24 # ms
+
+	# Distance around the player to look for characters in proximity,
+	# must be at least the largest character dimension since
+	# Character.in_proximity() reaches one character size around it
+	character_proximity_margin = 100 # px
+
+	# Parameters: simulation clock, real-time clock if not provided
+	def __init__(self, clock = None):
+		# Simulation clock that the game loop ticks once per update
+		# and that all entities read the time from
+		if clock == None:
+			clock = RealTimeClock()
+		self.clock = clock
+		Entity.set_clock(clock)
+
 		# Changes in the player's x and y velocities each frame
 		self.player_x_change = 0
 		self.player_y_change = 0
@@ -144,65 +276,154 @@ class Controller:
 		self.game_time = 0
 
 		# Time added to the game time from working or sleeping
-		# since the game time is based on SDL_GetTicks()
+		# since the game time is based on the simulation clock
 		self.added_time = 0
 
 		self.last_message = 0
-		self.last_morale_decreased = 0
-		self.last_health_decreased = 0
+
+		# Timed events, such as shopper generation and meter decreases
+		self.scheduler = Scheduler()
+
+		# Stores that open and close during the day
+		self.stores = []
+
+		# Next opening or closing event of each store
+		# {Store: ScheduledEvent}
+		self.store_transitions = {}
+
+		# Next shopper generation event of each open store
+		# {Store: ScheduledEvent}
+		self.shopper_generations = {}
+
+		# Whether stores far from the player are simulated
+		# with an abstract model instead of their characters
+		self.level_of_detail = True
+
+		# Stores that are currently simulated with the abstract model
+		# {Store: AbstractStore}
+		self.abstract_stores = {}
+
+		# Locations the player collided with on the last update
+		self.colliding_locations = None
+
+		# Spreads the infection between civilians near each other
+		self.transmission = Transmission()
+
+		# Residents of the neighborhoods, created with the world's
+		# neighborhoods in schedule_events()
+		self.population = Population([])
+
+		# Groups the characters were updated in on the last update
+		# {(type, Store, int): StateGroup}
+		self.state_groups = {}
 
 	def update_entities(self, entities):
+		# Rectangle the player's collisions are actually checked with
+		collision_x, collision_y, collision_width, collision_height\
+			= entities.player.get_collision_rect()
+
 		# Handle location collisions
-		for location in entities.locations:
+		colliding_locations = [location for location
+			in entities.location_tree.query(collision_x, collision_y,
+			collision_width, collision_height)
+			if entities.player.check_collision(location)]
+
+		for location in colliding_locations:
 			# Whether the player is inside the location
 			player_inside = False
 
 			if location.entity_inside(entities.player):
 				location.toggle_visibility(True)
 				player_inside = True
-			if entities.player.check_collision(location):
-				self.location_text = location.name
-				location.handle_collision(entities.player)
 
-				# Player is running into a wall
-				if location.is_visible() and not player_inside:
-					location.block_player_from_exiting(entities.player)
-			else:
-				location.toggle_visibility(False)
+			self.location_text = location.name
+			location.handle_collision(entities.player)
 
-		self.close_stores(entities)
+			# Player is running into a wall
+			if location.is_visible() and not player_inside:
+				location.block_player_from_exiting(entities.player)
+
+		# Hide locations the player is no longer colliding with
+		# All locations start visible, so check all of them the first time
+		if self.colliding_locations == None:
+			self.colliding_locations = entities.locations
+		for location in self.colliding_locations:
+			if location not in colliding_locations:
+				location.toggle_visibility(False)
+		self.colliding_locations = colliding_locations
 
 		# Handle map element collisions if applicable
-		for element in entities.map_elements:
+		for element in entities.map_element_tree.query(collision_x,
+			collision_y, collision_width, collision_height):
 			# Only check collisions for map elements that are collidable
 			if element.is_collidable:
 				if entities.player.check_collision(element):
 					element.handle_collision(entities.player)
 
-		# Remove removed characters and items
-		# TO DO: do this in the same iteration as the handle loop
-		for item in entities.items:
-			if item.removed:
-				entities.items.remove(item)
-				break
-
-		for character in entities.characters:
-			if character.removed:
-				entities.characters.remove(character)
-				break
-
-		# Handle item collisions/interactions
-		for item in entities.items:
+		# Handle item collisions/interactions with nearby items
+		for item in entities.item_grid.query(collision_x, collision_y,
+			collision_width, collision_height):
 			if entities.player.check_collision(item):
 				item.handle_collision(entities.player)
 				entities.player.add_nearby_item(item)
 				self.interaction_text = item.name + ": "\
 					+ item.interaction_message
 
-		# Handle character collisions/interactions
-		for character in entities.characters:
-			character.update(entities)
+				# Item may have been pushed
+				entities.item_grid.move(item)
 
+		# Update characters
+		# Characters that are state machines first do what does not depend
+		# on their state, then run their state handlers in groups
+		# of the same type, store and state
+		# {(type, Store, int): StateGroup}
+		carried_items = []
+		state_groups = {}
+		for character in entities.characters:
+			carried_items.append(character.item_being_carried)
+
+			if character.state_handlers == None:
+				character.update(entities)
+			elif character.prepare_update(entities):
+				key = (type(character), character.store, character.state)
+				if key in state_groups:
+					state_groups[key].characters.append(character)
+				else:
+					state_groups[key] = StateGroup(entities, character)
+
+		for state_group in state_groups.values():
+			state_group.update()
+		self.state_groups = state_groups
+
+		# Items carried by characters move along with them,
+		# including ones picked up or dropped during the update
+		for character, carried_item in zip(entities.characters,
+			carried_items):
+			entities.character_grid.move(character)
+
+			# Characters remove themselves (and what they carry)
+			# by flagging as removed, e.g. shoppers leaving the store
+			if character.removed:
+				entities.remove_character(character)
+
+			if carried_item != None:
+				entities.item_grid.move(carried_item)
+				if carried_item.removed:
+					entities.remove_item(carried_item)
+			if character.item_being_carried != None\
+			and character.item_being_carried != carried_item:
+				entities.item_grid.move(character.item_being_carried)
+
+		# Handle character collisions/interactions with nearby characters
+		# A vehicle is larger than any character, so the margin must also
+		# reach one vehicle size around it
+		margin = Controller.character_proximity_margin
+		if entities.player.vehicle != None:
+			margin = max(margin, entities.player.vehicle.width,
+				entities.player.vehicle.height)
+		for character in entities.character_grid.query(
+			collision_x - margin, collision_y - margin,
+			collision_width + margin * 2, collision_height + margin * 2):
 			if character.in_proximity(entities.player):
 				character.handle_close_proximity(entities.player,
 					self.messages)
@@ -226,23 +447,39 @@ class Controller:
 			entities.player.wearing_mask = True
 		
 		if self.player_interacted:
+			# Carried item is removed when it is checked out
+			# or put in a shopping cart
+			carried_item = entities.player.item_being_carried
 			entities.player.interact(self.messages, self.get_game_minutes())
+			if carried_item != None and carried_item.removed:
+				entities.remove_item(carried_item)
 
 		# TO DO: this is just a placeholder method to see what is in the
 		# player's inventory
 		if self.displayed_inventory	and 500\
-		< sdl2.SDL_GetTicks() - self.last_message:
+		< self.clock.get_ticks() - self.last_message:
 			self.messages.append('Closet contents: '
 				+ str(entities.player.closet))
 
 			self.messages.append('Backpack contents: '
 				+ str(entities.player.backpack))
 
-			self.last_message = sdl2.SDL_GetTicks()
+			self.last_message = self.clock.get_ticks()
 
 		entities.player.maintain_within_map(entities.map_rectangle)
 		entities.player.update()
 
+		# Items that move along with the player
+		if entities.player.vehicle != None:
+			entities.item_grid.move(entities.player.vehicle)
+		if entities.player.item_being_carried != None:
+			entities.item_grid.move(entities.player.item_being_carried)
+
+		# Working and sleeping skip the game time
+		time_skipped = entities.player.working or entities.player.sleeping
+		skip_start = self.get_game_minutes()
+		added_time = self.added_time
+
 		if entities.player.working:
 			self.handle_player_working(entities.player)
 
@@ -252,53 +489,390 @@ class Controller:
 		# Update game time
 		self.update_game_time(entities.player)
 
-		entities.player.reset_values()
+		# Catch the stores up with the skipped time,
+		# their opening or closing times also moved closer
+		if time_skipped:
+			self.fast_forward_stores(entities, skip_start,
+				self.added_time - added_time)
+			self.schedule_store_transitions(entities)
+			self.population.step((self.added_time - added_time) / 1440.0)
+			self.clock.skip((self.added_time - added_time) / 1440.0
+				* Controller.game_day_length)
 
-		# Decrease player morale every interval
-		if Controller.morale_decrease_interval < sdl2.SDL_GetTicks()\
-			- self.last_morale_decreased:
-			entities.player.morale -= 1
-			self.last_morale_decreased = sdl2.SDL_GetTicks()
+		entities.player.reset_values()
 
-		# Decrease player health if infected
-		if entities.player.infected and Controller.health_decrease_interval\
-			< sdl2.SDL_GetTicks() - self.last_health_decreased:
-			entities.player.health -= 1
-			self.last_health_decreased = sdl2.SDL_GetTicks()
+		# Timed events that are due
+		self.scheduler.run(self.clock.get_ticks())
 
 		self.current_money = entities.player.money
 		self.current_health = entities.player.health
 		self.current_morale = entities.player.morale
 
-		self.reset_values()
+		# Take out everything removed during this update
+		entities.compact()
 
-	# Generates new NPCs
-	def generate_NPCs(self, entities, textures):
+	# Schedules the timed events of the created world
+	# Called once before the first update
+	def schedule_events(self, entities):
 		for location in entities.locations:
-			if (location.type == LocationType.GROCERY_STORE\
-			or location.type == LocationType.GAS_STATION)\
-			and location.is_open(self.get_game_minutes()):
-				self.generate_shoppers(entities, textures, location)
-
-	# Generates new shoppers for grocery store every random shopper
-	# genereation interval
+			if location.type == LocationType.GROCERY_STORE\
+			or location.type == LocationType.GAS_STATION:
+				self.stores.append(location)
+		self.schedule_store_transitions(entities)
+
+		self.population = Population([len(houses)
+			* Population.residents_per_house
+			for houses in entities.neighborhoods])
+		self.schedule(Controller.population_update_interval,
+			self.update_population)
+
+		# Stockers created with the world come from the neighborhoods too
+		for character in entities.characters:
+			if isinstance(character, Stocker):
+				self.population.populate(character)
+
+		if self.level_of_detail:
+			self.schedule(0, self.update_level_of_detail, entities)
+
+		self.schedule(Controller.transmission_interval,
+			self.spread_infection, entities)
+		self.schedule(Controller.morale_decrease_interval,
+			self.decrease_morale, entities.player)
+		self.schedule(Controller.health_decrease_interval,
+			self.decrease_health, entities.player)
+
+	# Calls the method with the parameters once the simulation time
+	# has passed the parameter time: ms
+	def schedule(self, time, method, *parameters):
+		return self.scheduler.schedule(time, lambda: method(*parameters))
+
+	# Opens or closes every store for the current game time, then schedules
+	# its next opening or closing
+	# Called again when the game time is skipped, replacing the old events
+	def schedule_store_transitions(self, entities):
+		game_minutes = self.get_game_minutes() % 1440
+		for store in self.stores:
+			if store in self.store_transitions:
+				self.store_transitions[store].cancel()
+
+			if store.is_open(game_minutes):
+				self.open_store(entities, store)
+			else:
+				self.close_store(entities, store)
+
+	# Unlocks the store's doors and starts generating its shoppers,
+	# then schedules its closing
+	def open_store(self, entities, store):
+		store.set_door_locks(False)
+		if store not in self.shopper_generations:
+			self.shopper_generations[store] = self.schedule(
+				self.clock.get_ticks(), self.generate_shopper, entities, store)
+
+		self.store_transitions[store] = self.schedule(
+			self.get_ticks_at(store.close_time), self.close_store,
+			entities, store)
+
+	# Locks the store's doors and stops generating its shoppers,
+	# then schedules its opening
+	def close_store(self, entities, store):
+		store.set_door_locks(True)
+		if store in self.shopper_generations:
+			self.shopper_generations.pop(store).cancel()
+
+		self.store_transitions[store] = self.schedule(
+			self.get_ticks_at(store.open_time), self.open_store,
+			entities, store)
+
+	# Returns the simulation time of the next time the game time
+	# reaches the parameter game time: ms
+	# Only valid until the game time is skipped
+	def get_ticks_at(self, game_time):
+		minutes_left = (game_time - self.get_game_minutes()) % 1440
+		return self.clock.get_ticks()\
+			+ minutes_left / 1440.0 * Controller.game_day_length
+
+	# Generates a new shopper for the open store, then schedules
+	# the next one after a random shopper generation interval
 	# TO DO: can tie generation time upper bound to game difficulty
 	# for a more dense population
-	def generate_shoppers(self, entities, textures, store):
-		if store.time_before_next_npc_generation < sdl2.SDL_GetTicks()\
-		- store.last_npc_generated:
+	def generate_shopper(self, entities, store):
+		if store in self.abstract_stores:
+			self.abstract_stores[store].shoppers.append(
+				(self.clock.get_ticks() + store.shopper_visit_time, None))
+		else:
+			self.population.populate(entities.add_character(
+				CharacterType.SHOPPER,
+				store.entrance_x,
+				store.entrance_y - Civilian.default_height,
+				'Shopper',
+				entities.textures))
+
+		# Determine next time to generate shopper, within bounds
+		delay = random.randrange(
+			Controller.min_shopper_generation_interval,
+			Controller.max_shopper_generation_interval)
+		self.shopper_generations[store] = self.schedule(
+			self.clock.get_ticks() + delay, self.generate_shopper,
+			entities, store)
+
+	# Advances the stores over skipped game time without simulating it:
+	# shoppers that came and went while the store was open bought supplies
+	# off the shelves, and stockers refilled them from the stockroom
+	# Parameters: game time the skip started at and its length: minutes
+	def fast_forward_stores(self, entities, start_time, skipped_time):
+		# Shoppers in the stores before the skip are done shopping
+		# Stockers stay, as they are only done once the stockroom is empty
+		num_stockers = {}
+		for store, abstract_store in self.abstract_stores.items():
+			abstract_store.shoppers.clear()
+			num_stockers[store] = len(abstract_store.stockers)
+
+		for character in entities.characters:
+			if isinstance(character, Shopper):
+				if character.item_being_carried != None:
+					entities.remove_item(character.item_being_carried)
+				entities.remove_character(character)
+			elif isinstance(character, Stocker) and not character.removed:
+				num_stockers[character.store] = num_stockers.get(
+					character.store, 0) + 1
+
+		skipped_ticks = skipped_time / 1440.0 * Controller.game_day_length
+		shopper_generation_interval = (
+			Controller.min_shopper_generation_interval
+			+ Controller.max_shopper_generation_interval) / 2
+
+		for store in self.stores:
+			open_ticks = store.get_open_minutes(start_time, skipped_time)\
+				/ 1440.0 * Controller.game_day_length
+
+			self.sell_supplies(entities, store,
+				int(open_ticks / shopper_generation_interval
+				* store.shopper_purchase_chance / 100))
+			self.restock_shelves(entities, store,
+				int(num_stockers.get(store, 0) * skipped_ticks
+				/ Controller.stocker_placing_interval))
+
+	# Takes the number of random supplies off the store's shelves and
+	# out of the store, as if shoppers bought them
+	def sell_supplies(self, entities, store, num_supplies):
+		# Only look at the shelves if the ledger has anything on them
+		if num_supplies <= 0 or sum(store.ledger.shelves.values()) == 0:
+			return
+
+		supplies = [supply for aisle in store.aisles
+			for supply in store.get_supplies(aisle)]
+
+		for supply in random.sample(supplies, min(num_supplies,
+			len(supplies))):
+			store.remove_supply(supply)
+			entities.remove_item(supply)
+
+	# Places up to the number of supplies from the stockroom on free spots
+	# of the store's shelves, as if stockers placed them
+	# Supplies without a free spot in their aisles go back to the stockroom
+	def restock_shelves(self, entities, store, num_supplies):
+		# Only look for free spots if there is anything to place
+		if num_supplies <= 0 or store.get_stock_size() == 0:
+			return
+
+		# Free spots of each aisle type, stockers skip the wider center aisles
+		# <int, [(Aisle, int)]>
+		spots = {}
+		num_spots = 0
+		for aisle in store.aisles:
+			if aisle.width > Supply.default_width:
+				continue
+			for slot in range(len(aisle.slots)):
+				if aisle.slots[slot] == None:
+					spots.setdefault(aisle.supplies, []).append((aisle, slot))
+					num_spots += 1
+
+		for trip in range(num_supplies):
+			if num_spots == 0:
+				return
+
+			supply_type = store.take_stock()
+			if supply_type == None:
+				return
+
+			aisle_spots = spots.get(
+				AisleType.supply_aisles[supply_type], [])
+			if len(aisle_spots) == 0:
+				store.return_stock(supply_type)
+				continue
+
+			aisle, slot = aisle_spots.pop(random.randrange(0,
+				len(aisle_spots)))
+			num_spots -= 1
+
+			store.place_stock(entities.add_supply(supply_type, aisle.x,
+				aisle.get_slot_y(slot), entities.textures), aisle, slot)
+
+	# Simulates the stores near the player with their characters
+	# and the others with an abstract model, switching them as the player
+	# moves, then schedules the next update
+	def update_level_of_detail(self, entities):
+		player = entities.player
+		distance = Controller.detail_distance
+
+		for store in self.stores:
+			near_player = store.check_collision_directly(player.x - distance,
+				player.y - distance, player.width + distance * 2,
+				player.height + distance * 2)
+
+			if store in self.abstract_stores:
+				self.update_abstract_store(entities, store)
+				if near_player:
+					self.simulate_in_detail(entities, store)
+			elif not near_player:
+				self.simulate_abstractly(entities, store)
+
+		self.schedule(self.clock.get_ticks()
+			+ Controller.abstract_update_interval,
+			self.update_level_of_detail, entities)
+
+	# Replaces the characters in the store with the abstract model
+	# Shoppers carrying a supply leave with it, the others leave
+	# after half a visit
+	# Stockers put what they carry back in the stockroom
+	def simulate_abstractly(self, entities, store):
+		abstract_store = AbstractStore(self.clock.get_ticks())
+		self.abstract_stores[store] = abstract_store
+
+		for character in entities.characters:
+			if character.removed or not (isinstance(character, Shopper)
+				or isinstance(character, Stocker)):
+				continue
+
+			# Newly generated characters are not attached to the store yet
+			character_store = character.store
+			if character_store == None:
+				character_store = character.attach_location(entities)
+			if character_store != store:
+				continue
 
-			entities.add_character(
+			carried_item = character.item_being_carried
+			if isinstance(character, Shopper):
+				if carried_item == None:
+					abstract_store.shoppers.append((self.clock.get_ticks()
+						+ store.shopper_visit_time / 2,
+						CivilianRecord(character)))
+			else:
+				abstract_store.stockers.append(CivilianRecord(character))
+				if carried_item != None:
+					store.return_stock(carried_item.supply)
+
+			if carried_item != None:
+				entities.remove_item(carried_item)
+			entities.remove_character(character)
+
+	# Creates the characters of the abstract model in the store,
+	# shoppers that have not left yet start over from the entrance
+	# Civilians that were characters before get their records back,
+	# the others are new residents of the neighborhoods
+	def simulate_in_detail(self, entities, store):
+		abstract_store = self.abstract_stores.pop(store)
+
+		for departure, record in abstract_store.shoppers:
+			self.restore_civilian(entities.add_character(
 				CharacterType.SHOPPER,
 				store.entrance_x,
 				store.entrance_y - Civilian.default_height,
 				'Shopper',
-				textures)
+				entities.textures), record)
 
-			# Determine next time to generate shopper, within bounds
-			store.time_before_next_npc_generation = random.randrange(
-				3000, 18000) # ms
-			store.last_npc_generated = sdl2.SDL_GetTicks()
+		for record in abstract_store.stockers:
+			self.restore_civilian(entities.add_character(
+				CharacterType.STOCKER,
+				store.entrance_x,
+				store.y,
+				'Stocker',
+				entities.textures), record)
+
+	# Gives the civilian the attributes of the record,
+	# or makes it a new resident if there is no record
+	def restore_civilian(self, civilian, record):
+		if record != None:
+			record.restore(civilian)
+		else:
+			self.population.populate(civilian)
+
+	# Advances the abstract model of the store to the current time:
+	# shoppers that leave may have bought a supply, and stockers place
+	# supplies at their average rate until the stockroom is empty
+	def update_abstract_store(self, entities, store):
+		abstract_store = self.abstract_stores[store]
+		ticks = self.clock.get_ticks()
+
+		shoppers = abstract_store.shoppers
+		num_bought = 0
+		while len(shoppers) > 0 and shoppers[0][0] < ticks:
+			shoppers.popleft()
+			if random.randrange(0, 100) < store.shopper_purchase_chance:
+				num_bought += 1
+		self.sell_supplies(entities, store, num_bought)
+
+		if len(abstract_store.stockers) > 0:
+			abstract_store.placing_progress += len(abstract_store.stockers)\
+				* (ticks - abstract_store.last_update)\
+				/ Controller.stocker_placing_interval
+			num_placed = int(abstract_store.placing_progress)
+			abstract_store.placing_progress -= num_placed
+			self.restock_shelves(entities, store, num_placed)
+
+			if store.get_stock_size() == 0:
+				abstract_store.stockers.clear()
+
+		abstract_store.last_update = ticks
+
+	# Lets infected civilians infect the civilians near them
+	# over the interval, then schedules the next spread
+	def spread_infection(self, entities):
+		civilians = [character for character in entities.characters
+			if isinstance(character, Civilian) and not character.removed]
+
+		# Residents infected in the stores take the infection home
+		for civilian in self.transmission.spread(civilians,
+			Controller.transmission_interval):
+			if civilian.home != -1:
+				self.population.add_exposure(civilian.home)
+
+		self.schedule(self.clock.get_ticks()
+			+ Controller.transmission_interval, self.spread_infection,
+			entities)
+
+	# Returns list of the number of characters of the type (a state machine
+	# character class) in each state on the last update, in all stores
+	def get_state_counts(self, character_type):
+		counts = [0] * len(character_type.state_handlers)
+		for (group_type, store, state), state_group\
+		in self.state_groups.items():
+			if group_type == character_type:
+				counts[state] += len(state_group.characters)
+
+		return counts
+
+	# Advances the neighborhoods' population by one game hour,
+	# then schedules the next update
+	def update_population(self):
+		self.population.step(Controller.population_update_interval
+			/ Controller.game_day_length)
+
+		self.schedule(self.clock.get_ticks()
+			+ Controller.population_update_interval, self.update_population)
+
+	# Decreases player morale every interval
+	def decrease_morale(self, player):
+		player.morale -= 1
+		self.schedule(self.clock.get_ticks()
+			+ Controller.morale_decrease_interval, self.decrease_morale, player)
+
+	# Decreases player health every interval if infected
+	def decrease_health(self, player):
+		if player.infected:
+			player.health -= 1
+		self.schedule(self.clock.get_ticks()
+			+ Controller.health_decrease_interval, self.decrease_health, player)
 
 	# Returns true if the player's meters are good
 	# Returns false if the player lost the game
@@ -329,15 +903,6 @@ class Controller:
 		player.health += int(hours_slept)
 		self.added_time += (1440 - self.get_game_minutes()) + Bed.end_time
 
-	# Locks or unlocks stores based on the game time and the store's
-	# opening/closing times
-	def close_stores(self, entities):
-		for location in entities.locations:
-			if not location.is_open(self.get_game_minutes()):
-				location.set_door_locks(True)
-			else:
-				location.set_door_locks(False)
-
 	# Interface Methods:
 
 	# Interface between the controller and the UI for player movement input
@@ -387,7 +952,7 @@ class Controller:
 	# Updates the game day and time
 	# If day is over, subtracts supplies from player based on consumption
 	def update_game_time(self, player):
-		self.game_time = sdl2.SDL_GetTicks()\
+		self.game_time = self.clock.get_ticks()\
 			- self.game_day * Controller.game_day_length\
 			+ (self.added_time / 1440.0 * Controller.game_day_length)
 			
@@ -399,21 +964,22 @@ class Controller:
 			if self.game_day != 1:
 				player.consumption.consume_supplies(player, self.messages)
 
-		# Check if week passed
-		if self.game_day != 0 and self.game_day % 7 == 0:
-			# Deliver pay check money to player
-			player.money += player.paycheck
-			if player.paycheck != 0:
-				self.messages.append('Paycheck received: $'
-					+ str(int(player.paycheck)))
-			player.paycheck = 0
+			# Check if week passed
+			if self.game_day % 7 == 0:
+				# Deliver pay check money to player
+				player.money += player.paycheck
+				if player.paycheck != 0:
+					self.messages.append('Paycheck received: $'
+						+ str(int(player.paycheck)))
+				player.paycheck = 0
 
 	# Returns the in-game minutes based on the game day length
 	def get_game_minutes(self):
 		return (86400 / (Controller.game_day_length / 1000.0))\
 			* (self.game_time / 60000.0)
 
-	# Resets values that are only valid for each frame
+	# Resets input values once an update consumed them
+	# Called by the game loop since a frame can run several updates
 	def reset_values(self):
 		self.player_x_change = 0
 		self.player_y_change = 0
@@ -445,6 +1011,8 @@ class WorldCreator:
 		self.player_house = None
 
 	def create(self, entities, textures):
+		entities.textures = textures
+
 		self.create_road_system(entities, textures)
 
 		for neighborhood_road in self.neighborhood_roads:
@@ -458,6 +1026,9 @@ class WorldCreator:
 
 		self.place_player_in_house(entities.player)
 
+		# Nothing static is added after this point
+		entities.build_static_trees()
+
 		# Returns the rectangle of the world map
 		return (-WorldCreator.neighborhood_length\
 			- WorldCreator.store_distance_from_road, 0,\
@@ -558,22 +1129,25 @@ class WorldCreator:
 		num_houses = int(neighborhood_road.width
 			/ WorldCreator.neighborhood_house_x_spacing)
 
+		houses = []
+		entities.neighborhoods.append(houses)
+
 		# Create houses north of the road
 		for house in range(num_houses):
-			self.create_neighborhood_house(entities, textures,
+			houses.append(self.create_neighborhood_house(entities, textures,
 			neighborhood_road.x
 				+ (house * WorldCreator.neighborhood_house_x_spacing),
 			neighborhood_road.y - WorldCreator.neighborhood_house_y_spacing,
-			False, neighborhood_road)
+			False, neighborhood_road))
 
 		# Create houses south of the road
 		for house in range(num_houses):
-			self.create_neighborhood_house(entities, textures,
+			houses.append(self.create_neighborhood_house(entities, textures,
 			neighborhood_road.x
 				+ (house * WorldCreator.neighborhood_house_x_spacing),
 			neighborhood_road.y + neighborhood_road.height
 				+ WorldCreator.neighborhood_house_y_spacing
-				- House.default_height,	True, neighborhood_road)
+				- House.default_height,	True, neighborhood_road))
 
 	def create_neighborhood_house(self, entities, textures, x, y, rear,
 		neighborhood_road):
@@ -602,6 +1176,8 @@ class WorldCreator:
 				house.x + house.width / 2 - Sidewalk.default_width / 2,
 				neighborhood_road.y, True)
 
+		return house
+
 	def create_vehicles(self, entities, textures):
 		for location in entities.locations:
 			if location.type == LocationType.HOUSE\
@@ -681,13 +1257,15 @@ class WorldCreator:
 			GroceryStore.default_num_aisles, GroceryStore.aisle_length)
 
 		# Add larger grocery aisle on right end
-		self.generate_aisle(entities, textures,	grocery_store.x
+		self.generate_aisle(entities, textures, grocery_store, grocery_store.x
 			+ grocery_store.width - Supply.default_width, grocery_store.y
 			+ GroceryStore.aisle_spacing, GroceryStore.aisle_length,
 			AisleType.GROCERIES, 100, False)
 
+		grocery_store.create_navigation()
+
 		# Add stockroom supplies
-		grocery_store.stockroom = self.create_stock(entities, textures)
+		self.create_stock(grocery_store)
 
 		# Add stockers
 		entities.add_character(CharacterType.STOCKER, grocery_store.entrance_x,
@@ -697,26 +1275,29 @@ class WorldCreator:
 
 	def add_shopping_carts(self, entities, textures, grocery_store):
 		for cart in range(GroceryStore.default_num_carts):
-			entities.add_item(
+			shopping_cart = entities.add_item(
 				ItemType.SHOPPING_CART,
 				grocery_store.x + ShoppingCart.x_spacing,
 				grocery_store.y + grocery_store.height
 				- ShoppingCart.y_spacing * (cart + 1),
-				textures).angle = 90.0
+				textures)
+			shopping_cart.angle = 90.0
+			shopping_cart.store = grocery_store
 
 	def add_self_checkouts(self, entities, textures, store):
 		if store.type == LocationType.GAS_STATION:
-			entities.add_item(ItemType.SELF_CHECKOUT, store.x + store.width / 2,
-				store.y + store.height - SelfCheckout.default_height, textures)
+			store.add_checkout(entities.add_item(ItemType.SELF_CHECKOUT,
+				store.x + store.width / 2, store.y + store.height
+				- SelfCheckout.default_height, textures))
 			return
 
 		for checkout in range(GroceryStore.default_num_registers):
-			entities.add_item(
+			store.add_checkout(entities.add_item(
 				ItemType.SELF_CHECKOUT,
 				store.x + store.width / 3
 				+ checkout * SelfCheckout.x_spacing,
 				store.y + store.height
-				- SelfCheckout.y_spacing, textures)
+				- SelfCheckout.y_spacing, textures))
 
 	def add_aisles(self, entities, textures, store, num_aisles, length):
 		aisle_x = store.x
@@ -729,14 +1310,14 @@ class WorldCreator:
 			if aisle == num_aisles - 1:
 				aisle_type = AisleType.GROCERIES
 
-			self.generate_aisle(entities, textures,	aisle_x,
+			self.generate_aisle(entities, textures, store, aisle_x,
 				store.y + GroceryStore.aisle_spacing, length, aisle_type,
 				aisle_density, False)
 
 			# Grocery stores have double aisles with larger center aisle
 			if store.type == LocationType.GROCERY_STORE\
 			and aisle != num_aisles - 1:
-				self.generate_aisle(entities, textures,	aisle_x
+				self.generate_aisle(entities, textures, store, aisle_x
 					+ GroceryStore.aisle_spacing,
 					store.y + GroceryStore.aisle_spacing,
 					length, aisle_type, aisle_density, True)
@@ -761,22 +1342,12 @@ class WorldCreator:
 
 		return random_aisle_type
 
-	def generate_aisle(self, entities, textures, x, y, length, type, density,
-		center_aisle = False):
+	# Creates an aisle in the store and fills its shelf with supplies
+	def generate_aisle(self, entities, textures, store, x, y, length, type,
+		density, center_aisle = False):
 
 		# Types of supplies to place in aisle
-		valid_supply_types = []
-
-		# Determine valid supplies depending on aisle type
-		if type == AisleType.GROCERIES:
-			valid_supply_types.append(SupplyType.FOOD)
-		elif type == AisleType.TOILETRIES:
-			valid_supply_types.append(SupplyType.SOAP)
-			valid_supply_types.append(SupplyType.HAND_SANITIZER)
-			valid_supply_types.append(SupplyType.TOILET_PAPER)
-			valid_supply_types.append(SupplyType.MASK)
-		elif type == AisleType.PET_SUPPLIES:
-			valid_supply_types.append(SupplyType.PET_SUPPLIES)
+		valid_supply_types = AisleType.get_supply_types(type)
 
 		# Center aisles are wider
 		if center_aisle:
@@ -784,11 +1355,17 @@ class WorldCreator:
 		else:
 			width = Supply.default_width
 
+		aisle = entities.add_map_element(MapElementType.AISLE, x, y, width,
+			length, textures)
+		aisle.supplies = type
+		store.add_aisle(aisle)
+
 		# Minimum spacing between supplies
 		min_spacing = Supply.default_height * 1.5
 
 		# Maximum number of supplies for the aisle
 		max_num_supplies = int(length / (Supply.default_height + min_spacing))
+		aisle.create_slots(max_num_supplies, min_spacing)
 
 		for supply in range(max_num_supplies):
 			# Decide whether to add supply based on density
@@ -799,27 +1376,15 @@ class WorldCreator:
 			supply_type = valid_supply_types[
 				random.randrange(0, len(valid_supply_types))]
 
-			entities.add_supply(supply_type, x, y + supply\
-				* min_spacing, textures)
-
-		aisle = entities.add_map_element(MapElementType.AISLE, x, y, width,
-			length, textures)
-		aisle.supplies = type
+			store.add_supply(entities.add_supply(supply_type, x, y + supply\
+				* min_spacing, textures), aisle, supply)
 
 		return aisle
 		
-	# Randomly creates a list of supplies for the stockroom of a store
-	def create_stock(self, entities, textures):
-		stock = []
-
+	# Randomly fills the stockroom of a store
+	def create_stock(self, store):
 		for supply in range(GroceryStore.default_stockroom_size):
-			stock.append(entities.add_supply(
-				random.randrange(0, SupplyType.PET_SUPPLIES),
-				-1000000, # out of map
-				-1000000, # out of map
-				textures))
-
-		return stock
+			store.add_stock(random.randrange(0, SupplyType.PET_SUPPLIES))
 
 	def create_gas_station(self, entities, textures, x, y):
 		gas_station = entities.add_location(LocationType.GAS_STATION, x, y,
@@ -855,8 +1420,10 @@ class WorldCreator:
 		self.add_aisles(entities, textures, gas_station,
 			GasStation.default_num_aisles, GasStation.aisle_length)
 
+		gas_station.create_navigation()
+
 		# Add stockroom supplies
-		gas_station.stockroom = self.create_stock(entities, textures)
+		self.create_stock(gas_station)
 
 		# Add stockers
 		entities.add_character(CharacterType.STOCKER, gas_station.entrance_x,
@@ -898,6 +1465,7 @@ class WorldCreator:
 	def place_player_in_house(self, player):
 		player.x = self.player_house.x + self.player_house.width / 2
 		player.y = self.player_house.y + self.player_house.height / 2
+		player.reset_interpolation()
 	
 	# Populates the player's house with items
 	def create_player_house(self, entities, textures):
@@ -1,6 +1,19 @@
 import sdl2, math
 
+from clock import RealTimeClock
+
 class Entity:
+	# Attributes are stored in slots instead of a dictionary per entity,
+	# subclasses add their own attributes to __slots__ and keep values shared
+	# by every entity of the type (names, messages, dimensions) as class
+	# attributes
+	__slots__ = ('x', 'y', 'width', 'height', 'texture', 'angle',
+		'original_width', 'original_height', 'generation')
+
+	# Simulation clock shared by all entities
+	# The controller installs its own clock with Entity.set_clock()
+	clock = RealTimeClock()
+
 	def __init__(self, x = 0, y = 0, width = 0, height = 0, texture = None):
 		self.x = x
 		self.y = y
@@ -13,6 +26,15 @@ class Entity:
 		# the angle is not 0 or 180
 		self.original_width = self.width
 		self.original_height = self.height
+
+		# Incremented whenever the entity is removed from the game,
+		# so that handles to it can tell it is gone
+		self.generation = 0
+
+	# Sets the simulation clock that all entities read the time from
+	@staticmethod
+	def set_clock(clock):
+		Entity.clock = clock
 	
 	# Default render method
 	# Draws texture to x and y position on window in relation to the camera
@@ -67,7 +89,25 @@ class Entity:
 			self.width = self.original_width
 			self.height = self.original_height
 
+# Reference to an entity that can tell whether the entity was removed
+# from the game since the handle was created
+class Handle:
+	__slots__ = ('entity', 'generation')
+
+	def __init__(self, entity):
+		self.entity = entity
+		self.generation = entity.generation
+
+	# Returns the entity, or None if it was removed
+	def get(self):
+		if self.entity.generation != self.generation:
+			return None
+		return self.entity
+
 class MovableEntity(Entity):
+	__slots__ = ('speed', 'x_velocity', 'y_velocity', 'previous_x',
+		'previous_y', 'last_moved', 'movement_blocked')
+
 	def __init__(self, x, y, width, height, texture, speed):
 		Entity.__init__(self, x, y, width, height, texture)
 
@@ -78,8 +118,13 @@ class MovableEntity(Entity):
 		self.x_velocity = 0.0
 		self.y_velocity = 0.0
 
+		# Position before the most recent update, for drawing the entity
+		# in between updates
+		self.previous_x = self.x
+		self.previous_y = self.y
+
 		# Last moved - for frame independent movement: ms
-		self.last_moved = sdl2.SDL_GetTicks()
+		self.last_moved = self.clock.get_ticks()
 
 		# Whether another entity is blocking the movement of this entity
 		# e.g. colliding with another entity
@@ -88,8 +133,11 @@ class MovableEntity(Entity):
 	# Updates position based on velocity, independent of framerate
 	# Returns magnitude of distance traveled
 	def update_position(self):
+		self.previous_x = self.x
+		self.previous_y = self.y
+
 		# Time since last move: ms
-		time_elapsed = sdl2.SDL_GetTicks() - self.last_moved
+		time_elapsed = self.clock.get_ticks() - self.last_moved
 		
 		# Divide by 1000 because elapsed time is in ms,
 		# but velocities are in px / s
@@ -107,7 +155,7 @@ class MovableEntity(Entity):
 			# reset for next frame
 			self.movement_blocked = False
 
-		self.last_moved = sdl2.SDL_GetTicks()
+		self.last_moved = self.clock.get_ticks()
 
 		return math.sqrt(x_distance ** 2 + y_distance ** 2)
 
@@ -126,6 +174,19 @@ class MovableEntity(Entity):
 
 		Entity.render(self, renderer, camera_x, camera_y)
 	
+	# Returns the x and y distances from the current position to the
+	# position interpolated between the previous and current updates
+	# Alpha is the fraction of a simulation step since the last update
+	def interpolation_offset(self, alpha):
+		return (self.previous_x - self.x) * (1.0 - alpha),\
+			(self.previous_y - self.y) * (1.0 - alpha)
+
+	# Draws the entity at its current position until the next update,
+	# for entities placed somewhere instead of moving there, e.g. teleported
+	def reset_interpolation(self):
+		self.previous_x = self.x
+		self.previous_y = self.y
+
 	# Blocks movement for this frame
 	def block_movement(self):
 		self.movement_blocked = True
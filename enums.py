@@ -91,6 +91,23 @@ class AisleType:
 	TOILETRIES = 1
 	PET_SUPPLIES = 2
 
+	# Aisle type each supply type is placed in
+	# <SupplyType, AisleType>
+	supply_aisles = {
+		SupplyType.FOOD: GROCERIES,
+		SupplyType.SOAP: TOILETRIES,
+		SupplyType.HAND_SANITIZER: TOILETRIES,
+		SupplyType.TOILET_PAPER: TOILETRIES,
+		SupplyType.PET_SUPPLIES: PET_SUPPLIES,
+		SupplyType.MASK: TOILETRIES
+	}
+
+	# Returns list of the supply types placed in the aisle type
+	@staticmethod
+	def get_supply_types(aisle_type):
+		return [supply_type for supply_type, supply_aisle
+			in AisleType.supply_aisles.items() if supply_aisle == aisle_type]
+
 class InventoryType:
 	BACKPACK = 0
 	SHOPPING_CART = 1
@@ -109,3 +126,37 @@ class RoadType:
 	SMALL = 0
 	MEDIUM = 1
 	LARGE = 2
+
+class ShopperState:
+	ENTRANCE = 0
+	CENTER = 1
+	STORE_END = 2
+	AISLE = 3
+	AISLE_END = 4
+	ITEM = 5
+	EXIT = 6
+
+	state_strs = [
+		"At entrance",
+		"At center",
+		"At store end",
+		"At aisle",
+		"At aisle end",
+		"At item",
+		"At exit" ]
+
+class StockerState:
+	STOCKROOM = 0
+	CENTER = 1
+	STORE_END = 2
+	AISLE = 3
+	AISLE_END = 4
+	SHELF = 5
+
+	state_strs = [
+		"At stockroom",
+		"At center",
+		"At store end",
+		"At aisle",
+		"At aisle end",
+		"At shelf" ]
@@ -29,6 +29,7 @@ from items import (
 	Computer,
 	ShoppingCart,
 	Supply,
+	SupplyKind,
 	Door,
 	SelfCheckout,
 	Closet,
@@ -42,6 +43,38 @@ from npcs import (
 from player import Player
 from npcs import Character, Pet
 
+# Keeps removed entities so that factories can reuse them
+# instead of creating new ones
+class EntityPool:
+	def __init__(self):
+		# Removed entities that are ready to be reused
+		self.available = []
+
+		# Number of entities created because none were available
+		self.num_created = 0
+
+		# Number of entities reused
+		self.num_reused = 0
+
+	# Returns an available entity, or None if the pool is empty
+	def acquire(self):
+		if len(self.available) == 0:
+			return None
+
+		self.num_reused += 1
+		return self.available.pop()
+
+	# Keeps the removed entity for reuse
+	def release(self, entity):
+		self.available.append(entity)
+
+	# Returns the pool's sizes and counters
+	def get_metrics(self):
+		return {
+			'created': self.num_created,
+			'reused': self.num_reused,
+			'available': len(self.available)}
+
 # Abstract Factories:
 
 class ICharacterFactory:
@@ -66,13 +99,33 @@ class CharacterFactory:
 	def create(self, type, x, y, name, textures):
 		return self.factories.get(type).create(x, y, name, textures)
 
+	# Returns the sizes and counters of the shopper pool
+	def get_shopper_pool_metrics(self):
+		return self.factories[CharacterType.SHOPPER].pool.get_metrics()
+
+	# Keeps the removed character for reuse if its type is pooled
+	def release(self, character):
+		if isinstance(character, Shopper):
+			self.factories[CharacterType.SHOPPER].pool.release(character)
+
 class PetFactory(ICharacterFactory):
 	def create(self, x, y, name, textures):
 		return Pet(x, y, name, textures.get(TextureType.DOG))
 
+# Shoppers come and go all the time, so removed ones are reused
 class ShopperFactory(ICharacterFactory):
+	def __init__(self):
+		self.pool = EntityPool()
+
 	def create(self, x, y, name, textures):
-		return Shopper(x, y, name, textures.get(TextureType.CIVILIAN), None)
+		shopper = self.pool.acquire()
+		if shopper == None:
+			self.pool.num_created += 1
+			return Shopper(x, y, name, textures.get(TextureType.CIVILIAN),
+				None)
+
+		shopper.reset(x, y, name, textures.get(TextureType.CIVILIAN), None)
+		return shopper
 
 class StockerFactory(ICharacterFactory):
 	def create(self, x, y, name, textures):
@@ -256,13 +309,19 @@ class FuelDispenserFactory(IItemFactory):
 		return FuelDispenser(x, y, textures.get(TextureType.FUEL_DISPENSER))
 
 class ISupplyFactory:
+	# Texture and name of the supplies created by the factory
+	texture_type = None
+	name = ''
+
 	def __init__(self):
 		pass
 
-	# Abstract create method - returns newly created supply object
-	def create(self, x, y, name, textures):
-		pass
+	# Returns newly created description of the supplies of the type
+	def create_kind(self, type, textures):
+		return SupplyKind(type, self.name, textures.get(self.texture_type))
 
+# Supplies are removed whenever they are bought or carried out of a store,
+# so removed ones are reused
 class SupplyFactory:
 	def __init__(self):
 		# Maps supply type to factory
@@ -276,41 +335,57 @@ class SupplyFactory:
 		self.factories[SupplyType.MASK] = MaskFactory()
 		self.factories[SupplyType.PET_SUPPLIES] = PetSuppliesFactory()
 
-	# Returns newly created supply from corresponding factory
+		self.pool = EntityPool()
+
+		# Maps supply type to the description shared by its supplies,
+		# created by the corresponding factory the first time it is needed
+		# <SupplyType, SupplyKind>
+		self.kinds = {}
+
+	# Returns the description shared by the supplies of the type
+	def get_kind(self, type, textures):
+		kind = self.kinds.get(type)
+		if kind == None:
+			kind = self.factories.get(type).create_kind(type, textures)
+			self.kinds[type] = kind
+		return kind
+
+	# Returns newly created (or reused) supply of the type
 	def create(self, type, x, y, textures):
-		return self.factories.get(type).create(x, y, textures)
-	
-class FoodFactory(ILocationFactory):
-	def create(self, x, y, textures):
-		return Supply(x, y, Supply.default_width, Supply.default_height,
-			textures.get(TextureType.FOOD), 
-			SupplyType.FOOD, "Food")
+		kind = self.get_kind(type, textures)
 
-class SoapFactory(ILocationFactory):
-	def create(self, x, y, textures):
-		return Supply(x, y, Supply.default_width, Supply.default_height,
-			textures.get(TextureType.SOAP), 
-			SupplyType.SOAP, "Soap")
+		supply = self.pool.acquire()
+		if supply == None:
+			self.pool.num_created += 1
+			return Supply(x, y, kind)
 
-class HandSanitizerFactory(ILocationFactory):
-	def create(self, x, y, textures):
-		return Supply(x, y, Supply.default_width, Supply.default_height,
-			textures.get(TextureType.HAND_SANITIZER), 
-			SupplyType.HAND_SANITIZER, "Hand Sanitizer")
+		supply.reset(x, y, kind)
+		return supply
 
-class ToiletPaperFactory(ILocationFactory):
-	def create(self, x, y, textures):
-		return Supply(x, y, Supply.default_width, Supply.default_height,
-			textures.get(TextureType.TOILET_PAPER), 
-			SupplyType.TOILET_PAPER, "Toilet Paper")
+	# Keeps the removed supply for reuse
+	def release(self, supply):
+		self.pool.release(supply)
 
-class MaskFactory(ILocationFactory):
-	def create(self, x, y, textures):
-		return Supply(x, y, Supply.default_width, Supply.default_height,
-			textures.get(TextureType.MASK), SupplyType.MASK, "Mask")
+class FoodFactory(ISupplyFactory):
+	texture_type = TextureType.FOOD
+	name = 'Food'
 
-class PetSuppliesFactory(ILocationFactory):
-	def create(self, x, y, textures):
-		return Supply(x, y, Supply.default_width, Supply.default_height,
-			textures.get(TextureType.PET_SUPPLIES),
-			SupplyType.PET_SUPPLIES, "Pet Supplies")
\ No newline at end of file
+class SoapFactory(ISupplyFactory):
+	texture_type = TextureType.SOAP
+	name = 'Soap'
+
+class HandSanitizerFactory(ISupplyFactory):
+	texture_type = TextureType.HAND_SANITIZER
+	name = 'Hand Sanitizer'
+
+class ToiletPaperFactory(ISupplyFactory):
+	texture_type = TextureType.TOILET_PAPER
+	name = 'Toilet Paper'
+
+class MaskFactory(ISupplyFactory):
+	texture_type = TextureType.MASK
+	name = 'Mask'
+
+class PetSuppliesFactory(ISupplyFactory):
+	texture_type = TextureType.PET_SUPPLIES
+	name = 'Pet Supplies'
@@ -4,18 +4,38 @@ from renderer import Renderer, Camera, Textures
 from entities import Entities, Controller, WorldCreator
 from ui import UserInterface, MainMenu
 from enums import TextureType
+from clock import UnthrottledClock
 
 class Game:
-	# Parameters: starting values for money, health, and morale
-	def __init__(self, money, health, morale):
+	# Number of simulation updates per second of game time,
+	# independent from the frame rate
+	simulation_rate = 60 # updates / s
+
+	# Maximum frame rate, 0 for uncapped
+	max_frame_rate = 0 # frames / s
+
+	# Longest real time a single frame can account for, so that the game
+	# does not try to catch up on a long stall (e.g. dragging the window)
+	max_frame_time = 250 # ms
+
+	# Parameters: starting values for money, health, and morale,
+	# and the fixed step simulation clock (stepping at the simulation rate
+	# if not provided)
+	def __init__(self, money, health, morale, clock = None):
 		# Initialize renderer first because it starts SDL
 		self.renderer = Renderer()
 
 		self.textures = Textures()
 		self.textures.load(self.renderer.sdl_renderer)
 
-		self.user_interface = UserInterface(self.textures)
-		self.controller = Controller()
+		# The game loop paces the updates itself, so the clock
+		# only has to advance by one step per update
+		if clock == None:
+			clock = UnthrottledClock(1000.0 / Game.simulation_rate)
+		self.clock = clock
+
+		self.user_interface = UserInterface(self.textures, self.clock)
+		self.controller = Controller(self.clock)
 		self.entities = Entities()
 
 		self.entities.init_player(0, 0, self.textures.get(TextureType.PLAYER),
@@ -24,7 +44,13 @@ class Game:
 		world_creator = WorldCreator(2)
 		self.entities.map_rectangle = world_creator.create(
 			self.entities, self.textures)
+		self.controller.schedule_events(self.entities)
 
+	# Fixed timestep game loop:
+	# Real time is accumulated each frame and spent in steps of exactly one
+	# simulation step, so a frame can run several updates (low frame rate)
+	# or none (high frame rate). Moving entities are then drawn between
+	# their previous and current positions by the time left over
 	def run(self):
 		running = True
 
@@ -37,8 +63,22 @@ class Game:
 		+ Renderer.splash_screen_display_time:
 			self.renderer.render_splash_screen(self.textures)
 
+		# Length of a simulation update
+		step = self.clock.step # ms
+
+		# Real time that has not been simulated yet
+		accumulator = 0.0 # ms
+
+		previous_frame = sdl2.SDL_GetTicks()
+		last_frame = previous_frame
+
 		# Game loop:
 		while running:
+			current_frame = sdl2.SDL_GetTicks()
+			accumulator += min(current_frame - previous_frame,
+				Game.max_frame_time)
+			previous_frame = current_frame
+
 			# 1. Handle input from the user interface
 			screen_dimensions = [
 				self.renderer.screen_width,
@@ -47,9 +87,19 @@ class Game:
 				self.controller,
 				screen_dimensions)
 
-			# 2. Update entities from the controller
-			self.controller.update_entities(self.entities)
-			self.controller.generate_NPCs(self.entities, self.textures)
+			# 2. Update entities from the controller,
+			# once for every full step of accumulated time
+			updates = 0
+			while accumulator >= step:
+				self.clock.tick()
+				self.controller.update_entities(self.entities)
+				accumulator -= step
+				updates += 1
+
+			# Input is kept until an update consumed it
+			if updates > 0:
+				self.controller.reset_values()
+
 			# if not self.controller.check_player_meters(self.entities):
 			if self.controller.current_health <= 0 or self.controller.current_morale <= 0:
 				# Display splash screen
@@ -59,9 +109,17 @@ class Game:
 					self.renderer.render_lose_screen(self.textures)
 				running = False
 
-			# 3. Update screen from the renderer
+			# 3. Update screen from the renderer, interpolated by the
+			# fraction of a step that has not been simulated yet
 			self.renderer.render(self.entities,	self.textures,
-				self.user_interface, screen_dimensions)
+				self.user_interface, screen_dimensions, accumulator / step)
+
+			# Cap the frame rate if applicable
+			if Game.max_frame_rate > 0:
+				frame_time = sdl2.SDL_GetTicks() - current_frame
+				remaining_time = 1000 / Game.max_frame_rate - frame_time
+				if remaining_time > 0:
+					sdl2.SDL_Delay(int(remaining_time))
 
 			# For debugging:
 			# Average FPS for performance profiling, prints every 5 seconds
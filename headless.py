@@ -0,0 +1,111 @@
+import argparse, random, time
+
+from entities import Entities, Controller, WorldCreator
+from npcs import Shopper, Stocker
+from enums import ShopperState, StockerState
+from clock import UnthrottledClock
+
+# Stands in for Textures when there is no renderer
+# Every texture is None, which entities only use when rendering
+class NullTextures:
+	def get(self, texture_type):
+		return None
+
+	def load(self, renderer):
+		pass
+
+	def unload(self):
+		pass
+
+# Runs the simulation without a window, Tk or textures
+# The player is not controlled by anyone, so only the world
+# (NPCs, stores, game time and consumption) is exercised
+class HeadlessGame:
+	# Parameters: starting values for money, health, and morale,
+	# number of neighborhoods in the world, the simulation clock
+	# (unthrottled if not provided), and whether stores far from
+	# the player are simulated with an abstract model
+	def __init__(self, money, health, morale, num_neighborhoods = 2,
+		clock = None, level_of_detail = True):
+
+		if clock == None:
+			clock = UnthrottledClock()
+		self.clock = clock
+
+		self.textures = NullTextures()
+		self.controller = Controller(self.clock)
+		self.controller.level_of_detail = level_of_detail
+		self.entities = Entities()
+
+		self.entities.init_player(0, 0, None, money, health, morale)
+
+		world_creator = WorldCreator(num_neighborhoods)
+		self.entities.map_rectangle = world_creator.create(
+			self.entities, self.textures)
+		self.controller.schedule_events(self.entities)
+
+		# Number of updates performed so far
+		self.steps = 0
+
+	# Performs one simulation update
+	def step(self):
+		self.clock.tick()
+
+		self.controller.update_entities(self.entities)
+		self.controller.reset_values()
+
+		# Nobody reads the messages, so do not let them pile up
+		self.controller.messages.clear()
+
+		self.steps += 1
+
+	# Performs the number of updates
+	def run(self, steps):
+		for step in range(steps):
+			self.step()
+
+	# Performs updates until the number of game days passed
+	def run_days(self, days):
+		# The first update wakes the player up, which starts day 1
+		if self.steps == 0:
+			self.step()
+
+		end_day = self.controller.game_day + days
+		while self.controller.game_day < end_day:
+			self.step()
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(
+		description='Runs the simulation without a window')
+	parser.add_argument('--days', type=int, default=1,
+		help='number of game days to simulate')
+	parser.add_argument('--neighborhoods', type=int, default=2,
+		help='number of neighborhoods in the world')
+	parser.add_argument('--seed', type=int, default=None,
+		help='random seed for a reproducible world')
+	parser.add_argument('--full-detail', action='store_true',
+		help='simulate the characters of every store, however far')
+	args = parser.parse_args()
+
+	random.seed(args.seed)
+
+	game = HeadlessGame(1000, 100, 70, args.neighborhoods,
+		level_of_detail = not args.full_detail)
+
+	start_time = time.perf_counter()
+	game.run_days(args.days)
+	elapsed_time = time.perf_counter() - start_time
+
+	print('Simulated ' + str(args.days) + ' game days in '
+		+ str(game.steps) + ' updates: ' + str(round(elapsed_time, 2))
+		+ ' s (' + str(int(game.steps / elapsed_time)) + ' updates / s)')
+	print('Characters: ' + str(len(game.entities.characters))
+		+ ' - Items: ' + str(len(game.entities.items)))
+	print('Shopper pool: '
+		+ str(game.entities.character_factory.get_shopper_pool_metrics())
+		+ ' - Supply pool: '
+		+ str(game.entities.supply_factory.pool.get_metrics()))
+	print('Shoppers by state: ' + str(dict(zip(ShopperState.state_strs,
+		game.controller.get_state_counts(Shopper)))))
+	print('Stockers by state: ' + str(dict(zip(StockerState.state_strs,
+		game.controller.get_state_counts(Stocker)))))
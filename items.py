@@ -4,20 +4,23 @@ from entity import Entity
 from enums import ItemType, PetType, InventoryType, SupplyType
 
 class Item(Entity):
+	__slots__ = ('type', 'last_interaction', 'removed')
+
 	# Minimum time between interact actions
 	action_interval = 250 # ms
 
+	# Shown to the player when nearby, overridden by each item type
+	name = ''
+	interaction_message = ''
+
 	def __init__(self, x = 0, y = 0, width = 0, height = 0, texture = None,
-		type = 0, name = '', interaction_message = ''):
+		type = 0):
 
 		Entity.__init__(self, x, y, width, height, texture)
 		self.type = type
 
-		self.name = name
-		self.interaction_message = interaction_message
-
 		# Last time the player interacted with the item: ms
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
 
 		# If true, the controller will remove this entity from the game
 		self.removed = False
@@ -48,10 +51,63 @@ class Item(Entity):
 	# Interaction must be limited because so that the player only interacts once
 	# because pressing the interact button lasts more than one frame
 	def check_action_interval(self):
-		return sdl2.SDL_GetTicks() - self.last_interaction\
+		return self.clock.get_ticks() - self.last_interaction\
 			> Item.action_interval
 
+# Item that characters touch with their hands, which infected characters
+# contaminate
+# The contamination decays over time, but is only worked out when the item
+# is touched, from the contamination and time of the last touch, so items
+# that nobody touches cost nothing
+# Classes add 'contamination' and 'last_touched' to their own __slots__
+class Surface:
+	__slots__ = ()
+
+	# Default values:
+
+	# Contamination left by an infected character
+	max_contamination = 100.0 # %
+
+	# Time for the contamination to halve, about two game hours
+	contamination_half_life = 50000 # ms
+
+	# Chance of becoming infected from touching an item
+	# with the maximum contamination
+	infection_chance = 20 # %
+
+	def __init__(self):
+		# Contamination at the last touch: %
+		self.contamination = 0.0
+
+		# Last time a character touched the item: ms
+		# Contamination also decays over the skipped game time
+		self.last_touched = Entity.clock.get_elapsed_ticks()
+
+	# Returns the current contamination: %
+	def get_contamination(self):
+		if self.contamination == 0:
+			return 0.0
+
+		return self.contamination * 0.5 ** ((Entity.clock.get_elapsed_ticks()
+			- self.last_touched) / Surface.contamination_half_life)
+
+	# Touches the item, contaminating it if the character is infected
+	# Returns the contamination before the touch: %
+	def touch(self, character):
+		contamination = self.get_contamination()
+
+		if character.infected:
+			self.contamination = Surface.max_contamination
+		else:
+			self.contamination = contamination
+		self.last_touched = Entity.clock.get_elapsed_ticks()
+
+		return contamination
+
 class Vehicle(Item):
+	__slots__ = ('attached', 'current_fuel', 'max_fuel', 'belongs_to_player',
+		'texture_clip')
+
 	# Default values:
 
 	# Dimensions
@@ -73,8 +129,7 @@ class Vehicle(Item):
 
 	def __init__(self, x, y, texture):
 		Item.__init__(self, x, y, Vehicle.default_width, Vehicle.default_height,
-			texture, ItemType.VEHICLE, Vehicle.name,
-			Vehicle.interaction_message)
+			texture, ItemType.VEHICLE)
 
 		# Whether the vehicle is attached to the player
 		self.attached = False
@@ -124,7 +179,7 @@ class Vehicle(Item):
 	def handle_interaction(self, player, messages, game_time = 0):
 		if not self.check_action_interval():
 			return
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
 
 		if not self.belongs_to_player:
 			messages.append('This vehicle does not belong to you')
@@ -146,12 +201,14 @@ class Vehicle(Item):
 		player.vehicle = self
 		player.x = self.x
 		player.y = self.y
+		player.reset_interpolation()
 		self.attached = True
 
 	# Detaches player to the vehicle
 	def detach(self, player):
 		player.vehicle = None
 		player.x = self.x - player.width
+		player.reset_interpolation()
 		self.attached = False
 
 	# Returns the percentage of the fuel tank
@@ -172,6 +229,8 @@ class Vehicle(Item):
 			int(self.width), int(self.height)), 0, None, sdl2.SDL_FLIP_NONE)
 
 class Sink(Item):
+	__slots__ = ()
+
 	# Default values:
 
 	# Dimensions
@@ -186,7 +245,7 @@ class Sink(Item):
 
 	def __init__(self, x, y, texture):
 		Item.__init__(self, x, y, Sink.default_width, Sink.default_height,
-			texture, ItemType.SINK, Sink.name, Sink.interaction_message)
+			texture, ItemType.SINK)
 
 	def handle_collision(self, player):
 		Item.handle_collision(self, player)
@@ -195,7 +254,7 @@ class Sink(Item):
 	def handle_interaction(self, player, messages, game_time = 0):
 		if not self.check_action_interval():
 			return
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
 		
 		if player.use_supply(SupplyType.SOAP, 1):
 			messages.append(Sink.successful_message)
@@ -203,6 +262,8 @@ class Sink(Item):
 			messages.append(Sink.unsuccessful_message)
 
 class Kitchen(Item):
+	__slots__ = ()
+
 	# Default values:
 
 	# Dimensions
@@ -220,8 +281,7 @@ class Kitchen(Item):
 
 	def __init__(self, x, y, texture):
 		Item.__init__(self, x, y, Kitchen.default_width, Kitchen.default_height,
-			texture, ItemType.KITCHEN, Kitchen.name,
-			Kitchen.interaction_message)
+			texture, ItemType.KITCHEN)
 
 	def handle_collision(self, player):
 		Item.handle_collision(self, player)
@@ -229,7 +289,7 @@ class Kitchen(Item):
 	def handle_interaction(self, player, messages, game_time = 0):
 		if not self.check_action_interval():
 			return
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
 		
 		if player.use_supply(SupplyType.FOOD, 1):
 			player.morale += Kitchen.eating_morale_boost
@@ -239,6 +299,8 @@ class Kitchen(Item):
 			messages.append(Kitchen.unsuccessful_message)
 
 class Bed(Item):
+	__slots__ = ()
+
 	# Default values:
 
 	# Dimensions
@@ -259,7 +321,7 @@ class Bed(Item):
 
 	def __init__(self, x, y, texture):
 		Item.__init__(self, x, y, Bed.default_width, Bed.default_height,
-			texture, ItemType.BED, Bed.name, Bed.interaction_message)
+			texture, ItemType.BED)
 
 	def handle_collision(self, player):
 		Item.handle_collision(self, player)
@@ -268,7 +330,7 @@ class Bed(Item):
 	def handle_interaction(self, player, messages, game_time = 0):
 		if not self.check_action_interval():
 			return
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
 
 		if game_time > Bed.start_time or game_time < Bed.end_time:
 			player.sleeping = True
@@ -277,6 +339,8 @@ class Bed(Item):
 			messages.append(Bed.unsuccessful_message_time)
 
 class Computer(Item):
+	__slots__ = ()
+
 	# Default values:
 
 	# Dimensions
@@ -297,8 +361,7 @@ class Computer(Item):
 
 	def __init__(self, x, y, texture):
 		Item.__init__(self, x, y, Computer.default_width,
-			Computer.default_height, texture, ItemType.COMPUTER, Computer.name,
-			Computer.interaction_message)
+			Computer.default_height, texture, ItemType.COMPUTER)
 
 	def handle_collision(self, player):
 		Item.handle_collision(self, player)
@@ -307,7 +370,7 @@ class Computer(Item):
 	def handle_interaction(self, player, messages, game_time = 0):
 		if not self.check_action_interval():
 			return
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
 
 		if game_time > Computer.start_time:
 			player.working = True
@@ -315,7 +378,10 @@ class Computer(Item):
 		else:
 			messages.append(Computer.unsuccessful_message_time)
 
-class ShoppingCart(Item):
+class ShoppingCart(Item, Surface):
+	__slots__ = ('items', 'total_cost', 'last_moved', 'store',
+		'contamination', 'last_touched')
+
 	# Default values:
 
 	# Dimensions
@@ -337,8 +403,8 @@ class ShoppingCart(Item):
 
 	def __init__(self, x, y, texture):
 		Item.__init__(self, x, y, ShoppingCart.default_width,
-			ShoppingCart.default_height, texture, ItemType.SHOPPING_CART,
-			ShoppingCart.name, ShoppingCart.interaction_message)
+			ShoppingCart.default_height, texture, ItemType.SHOPPING_CART)
+		Surface.__init__(self)
 
 		self.items = Inventory(InventoryType.SHOPPING_CART,
 			ShoppingCart.default_capacity)
@@ -347,7 +413,11 @@ class ShoppingCart(Item):
 		self.total_cost = 0.0
 
 		# Last time the player moved the cart
-		self.last_moved = sdl2.SDL_GetTicks()
+		self.last_moved = self.clock.get_ticks()
+
+		# Store whose carts the contents are counted in,
+		# None if they are not counted in any, e.g. once taken out
+		self.store = None
 
 	# Pushes the cart with the player's velocity if the player is running
 	def handle_collision(self, player):
@@ -360,7 +430,7 @@ class ShoppingCart(Item):
 			return
 
 		# Time since last move: ms
-		time_elapsed = sdl2.SDL_GetTicks() - self.last_moved
+		time_elapsed = self.clock.get_ticks() - self.last_moved
 
 		# Reset time elapsed if the player has not touched the
 		# shopping cart recently
@@ -402,13 +472,19 @@ class ShoppingCart(Item):
 		self.x += player.x_velocity * time_elapsed / 1000.0
 		self.y += player.y_velocity * time_elapsed / 1000.0
 
-		self.last_moved = sdl2.SDL_GetTicks()
+		self.last_moved = self.clock.get_ticks()
+
+		# Contents pushed out of the store are no longer the store's
+		if self.store != None and not self.store.check_collision(self):
+			self.release_contents()
+			self.store = None
 		
 	# Place item inside
 	def handle_interaction(self, player, messages, game_time = 0):
 		if not self.check_action_interval():
 			return
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
+		player.touch(self, messages)
 
 		if player.item_being_carried != None:
 			if not self.items.add_supply(player.item_being_carried.supply):
@@ -416,6 +492,17 @@ class ShoppingCart(Item):
 				return
 			
 			self.total_cost += player.item_being_carried.price
+
+			# Now counted through the contents of the shopping cart
+			supply = player.item_being_carried
+			if supply.store != self.store:
+				if supply.store != None:
+					supply.store.ledger.move(supply.supply,
+						supply.store.ledger.carts, None)
+				if self.store != None:
+					self.store.ledger.move(supply.supply, None,
+						self.store.ledger.carts)
+			supply.store = None
 			player.item_being_carried.removed = True
 			player.item_being_carried = None
 			messages.append('Item added to shopping cart')
@@ -423,37 +510,81 @@ class ShoppingCart(Item):
 		else:
 			messages.append('Not carrying any items')
 
-class Supply(Item):
+	# Takes the contents out of the carts of the store they are counted in,
+	# once they are paid for or taken out of the store
+	def release_contents(self):
+		if self.store == None:
+			return
+
+		for supply_type, quantity in self.items.supplies.items():
+			self.store.ledger.move(supply_type, self.store.ledger.carts, None,
+				quantity)
+
+# Everything about a supply that is the same for every supply of its type
+# is read from its SupplyKind, so supplies only keep their own state
+class Supply(Item, Surface):
+	__slots__ = ('kind', 'being_carried', 'aisle', 'slot', 'store',
+		'visible', 'contamination', 'last_touched')
+
 	# Default values:
 
 	# Dimensions
 	default_width = 40 # px
 	default_height = 40 # px
 
-	interaction_message = 'pick up / drop (E)'
+	# How much money a supply costs
+	# TO DO: base on supply type and difficulty
+	default_price = 5
 
-	def __init__(self, x, y, width, height, texture, type, name):
-		Item.__init__(self, x, y, Supply.default_width, Supply.default_height,
-			texture, ItemType.SUPPLY, name, Supply.interaction_message)
+	default_interaction_message = 'pick up / drop (E)'
 
-		# SupplyType
-		self.supply = type
+	def __init__(self, x, y, kind):
+		Item.__init__(self, x, y, kind.width, kind.height, kind.texture,
+			ItemType.SUPPLY)
+		Surface.__init__(self)
 
-		# How much money the supply costs
-		self.price = 0.0
+		# Shared description of the supply type
+		self.kind = kind
 
 		# Whether the player is carrying the supply
 		self.being_carried = False
 
+		# Aisle whose shelf the supply is on and its position on the shelf
+		# None and -1 if the supply is not on a shelf
+		self.aisle = None
+		self.slot = -1
+
+		# Store whose carts the supply is counted in since it was taken off
+		# a shelf, None if it is not counted in any
+		self.store = None
+
 		# Whether or not to render the supply
 		self.visible = True
 
-	# TO DO: implement later
-	# Generates a price based on the supply type and difficulty
-	def generate_price(self, difficulty):
-		self.price = 5
-		self.interaction_message = Supply.interaction_message\
-			+ ' - $' + str(self.price)
+	# Reinitializes a removed supply so that it can be reused
+	# Keeps the generation so that handles to the removed supply stay invalid
+	def reset(self, x, y, kind):
+		generation = self.generation
+		Supply.__init__(self, x, y, kind)
+		self.generation = generation
+
+	# SupplyType
+	@property
+	def supply(self):
+		return self.kind.type
+
+	@property
+	def name(self):
+		return self.kind.name
+
+	# How much money the supply costs
+	@property
+	def price(self):
+		return self.kind.price
+
+	@property
+	def interaction_message(self):
+		return self.kind.interaction_message
 
 	# Adjusts supply to the player
 	def carry(self, player):
@@ -498,15 +629,26 @@ class Supply(Item):
 	def handle_interaction(self, player, messages, game_time = 0):
 		if not self.check_action_interval():
 			return
+		player.touch(self, messages)
 
 		if self.being_carried:
 			player.item_being_carried = None
 			self.being_carried = False
+
+			# Dropped supply is not on its way to being paid for anymore
+			if self.store != None:
+				self.store.ledger.move(self.supply, self.store.ledger.carts,
+					None)
+				self.store = None
 		else:
 			player.item_being_carried = self
 			self.being_carried = True
 
-		self.last_interaction = sdl2.SDL_GetTicks()
+			# Take the supply off its shelf
+			if self.aisle != None:
+				self.aisle.store.remove_supply(self)
+
+		self.last_interaction = self.clock.get_ticks()
 
 	# Transfers supply to player's backpack if the player
 	# has enough room and money for it
@@ -533,7 +675,34 @@ class Supply(Item):
 		if self.visible:
 			Item.render(self, renderer, camera_x, camera_y)
 
-class Door(Item):
+# Description shared by every supply of a supply type
+# Created once per type by SupplyFactory and never changed afterwards
+class SupplyKind:
+	__slots__ = ('type', 'name', 'texture', 'width', 'height', 'price',
+		'interaction_message')
+
+	def __init__(self, type, name, texture, price = Supply.default_price,
+		width = Supply.default_width, height = Supply.default_height):
+
+		# SupplyType
+		self.type = type
+
+		self.name = name
+		self.texture = texture
+
+		# Dimensions: px
+		self.width = width
+		self.height = height
+
+		self.price = price
+
+		# Built once instead of for every supply
+		self.interaction_message = Supply.default_interaction_message\
+			+ ' - $' + str(price)
+
+class Door(Item, Surface):
+	__slots__ = ('locked', 'contamination', 'last_touched')
+
 	# Default values:
 
 	# Dimensions
@@ -547,7 +716,8 @@ class Door(Item):
 
 	def __init__(self, x, y, texture):
 		Item.__init__(self, x, y, Door.default_width, Door.default_height,
-			texture, ItemType.DOOR, Door.name, Door.interaction_message)
+			texture, ItemType.DOOR)
+		Surface.__init__(self)
 
 		# Whether the player can currently access the door
 		self.locked = False
@@ -559,7 +729,8 @@ class Door(Item):
 	def handle_interaction(self, player, messages, game_time = 0):
 		if not self.check_action_interval():
 			return
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
+		player.touch(self, messages)
 
 		# Door is locked
 		if self.locked:
@@ -572,8 +743,12 @@ class Door(Item):
 		# Player is above the door
 		elif player.y < self.y:
 			player.y += (player.height * 2.5)
+		player.reset_interpolation()
+
+class SelfCheckout(Item, Surface):
+	__slots__ = ('interaction_message', 'store', 'contamination',
+		'last_touched')
 
-class SelfCheckout(Item):
 	# Default values:
 
 	# Dimensions
@@ -587,7 +762,7 @@ class SelfCheckout(Item):
 	y_spacing = 300 # px
 
 	name = 'Self-checkout'
-	interaction_message = 'checkout items (E)'
+	default_interaction_message = 'checkout items (E)'
 
 	unsuccessful_message_no_items = 'No items to check out'
 	unsuccessful_message_money = 'Not enough money to purchase items'
@@ -596,8 +771,14 @@ class SelfCheckout(Item):
 
 	def __init__(self, x, y, texture):
 		Item.__init__(self, x, y, SelfCheckout.default_width,
-		SelfCheckout.default_height, texture, ItemType.SELF_CHECKOUT,
-		SelfCheckout.name, SelfCheckout.interaction_message)
+		SelfCheckout.default_height, texture, ItemType.SELF_CHECKOUT)
+		Surface.__init__(self)
+
+		# Includes the total cost of the player's cart once known
+		self.interaction_message = SelfCheckout.default_interaction_message
+
+		# Store the register is in
+		self.store = None
 
 	def handle_collision(self, player):
 		Item.handle_collision(self, player)
@@ -605,7 +786,8 @@ class SelfCheckout(Item):
 		# Determine total price of all items in the user's cart
 		if player.shopping_cart != None:
 			total_cost = player.shopping_cart.total_cost
-			self.interaction_message = SelfCheckout.interaction_message\
+			self.interaction_message =\
+				SelfCheckout.default_interaction_message\
 				+ ' - total cost: $' + str(int(total_cost))
 
 	# Transfers contents of the shopping cart to the player's backpack
@@ -613,7 +795,8 @@ class SelfCheckout(Item):
 	def handle_interaction(self, player, messages, game_time = 0):
 		if not self.check_action_interval():
 			return
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
+		player.touch(self, messages)
 		
 		# Allow the player to checkout just one item if they are holding it
 		if player.shopping_cart == None or player.shopping_cart.items.size == 0:
@@ -635,6 +818,9 @@ class SelfCheckout(Item):
 			messages.append(SelfCheckout.unsuccessful_message_space)
 			return
 
+		# Paid for items are no longer in the store's carts
+		player.shopping_cart.release_contents()
+
 		# Transfer shopping cart items to player's backpack
 		player.money -= total_cost
 		player.shopping_cart.items.transfer(player.backpack)
@@ -644,6 +830,8 @@ class SelfCheckout(Item):
 		messages.append('Backpack contents: ' + str(player.backpack))
 
 class Closet(Item):
+	__slots__ = ()
+
 	# Default values:
 
 	# Dimensions
@@ -658,7 +846,7 @@ class Closet(Item):
 
 	def __init__(self, x, y, texture):
 		Item.__init__(self, x, y, Closet.default_width, Closet.default_height,
-			texture, ItemType.CLOSET, Closet.name, Closet.interaction_message)
+			texture, ItemType.CLOSET)
 
 	def handle_collision(self, player):
 		Item.handle_collision(self, player)
@@ -668,7 +856,7 @@ class Closet(Item):
 	def handle_interaction(self, player, messages, game_time = 0):
 		if not self.check_action_interval():
 			return
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
 
 		if player.backpack.size == 0:
 			messages.append(Closet.unsuccessful_message_backpack)
@@ -684,6 +872,8 @@ class Closet(Item):
 		messages.append('Closet contents: ' + str(player.closet))
 
 class FuelDispenser(Item):
+	__slots__ = ('interaction_message', 'price')
+
 	# Default values:
 
 	# Dimensions
@@ -691,18 +881,20 @@ class FuelDispenser(Item):
 	default_height = 120 # px
 
 	name = 'Fuel Dispenser'
-	interaction_message = 'fill up car (E)'
+	default_interaction_message = 'fill up car (E)'
 
 	unsuccessful_message_vehicle = 'Vehicle required to fill up'
 	unsuccessful_message_money = 'Not enough money to fill up vehicle'
 
 	def __init__(self, x, y, texture):
 		Item.__init__(self, x, y, FuelDispenser.default_width,
-			FuelDispenser.default_height, texture, ItemType.FUEL_DISPENSER,
-			FuelDispenser.name, FuelDispenser.interaction_message)
+			FuelDispenser.default_height, texture, ItemType.FUEL_DISPENSER)
 		
 		self.price = 0
 
+		# Includes the price once it is set
+		self.interaction_message = FuelDispenser.default_interaction_message
+
 	def handle_collision(self, player):
 		Item.handle_collision(self, player)
 
@@ -710,7 +902,7 @@ class FuelDispenser(Item):
 	def handle_interaction(self, player, messages, game_time = 0):
 		if not self.check_action_interval():
 			return
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
 
 		if player.vehicle == None:
 			messages.append(FuelDispenser.unsuccessful_message_vehicle)
@@ -729,7 +921,8 @@ class FuelDispenser(Item):
 	# Sets the price of the fuel and updates interaction message
 	def set_price(self, new_price):
 		self.price = new_price
-		self.interaction_message = FuelDispenser.interaction_message + ' - $'
+		self.interaction_message =\
+			FuelDispenser.default_interaction_message + ' - $'
 		self.interaction_message += str(self.price) + ' per gallon'
 
 class Inventory:
@@ -1,13 +1,18 @@
-import sdl2
+import sdl2, bisect, collections
 
 from entity import Entity
-from enums import LocationType, MapElementType
+from items import Supply, Door
+from enums import LocationType, MapElementType, SupplyType
 
 class Location(Entity):
-	def __init__(self, x, y, width, height, texture, facade_texture, name, type):
+	__slots__ = ('type', 'facade', 'entrance_x', 'entrance_y', 'doors')
+
+	# Shown to the player when inside, overridden by each location type
+	name = ''
+
+	def __init__(self, x, y, width, height, texture, facade_texture, type):
 		Entity.__init__(self, x, y, width, height, texture)
 
-		self.name = name
 		self.type = type
 
 		# Covers the interior of the location when the player is not inside
@@ -19,12 +24,6 @@ class Location(Entity):
 
 		# List of doors
 		self.doors = []
-
-		# Last time a NPC was generated for this location
-		self.last_npc_generated = 0
-
-		# Time before next NPC is generated for this location
-		self.time_before_next_npc_generation = 0
 	
 	# Blocks player movement if the player is not inside
 	def handle_collision(self, player):
@@ -86,17 +85,280 @@ class Location(Entity):
 			door.locked = locked
 
 class House(Location):
+	__slots__ = ()
+
 	# Default values:
 
 	# Dimensions
 	default_width = 700 # px
 	default_height = 500 # px
 
+	name = 'House'
+
 	def __init__(self, x, y, width, height, texture, facade_texture):
 		Location.__init__(self, x, y, width, height, texture,
-			facade_texture, "House", LocationType.HOUSE)
+			facade_texture, LocationType.HOUSE)
+
+# Location that sells supplies and keeps track of its own aisles,
+# shelf supplies and checkouts so that NPCs do not search the world for them
+class Store(Location):
+	__slots__ = ('ledger', 'last_stock_type', 'aisles', 'aisle_xs',
+		'checkouts', 'navigation')
+
+	def __init__(self, x, y, width, height, texture, facade_texture, type):
+		Location.__init__(self, x, y, width, height, texture,
+			facade_texture, type)
+
+		# Number of supplies of each type on the shelves, in the stock room
+		# and in carts, kept up to date as supplies move around
+		# Supply entities for the stock room are only created
+		# when a stocker takes one out
+		self.ledger = StockLedger()
+
+		# Supply type last taken out of the stock room, types are taken
+		# in turn so that supplies that could not be placed
+		# do not keep stockers from placing the others
+		self.last_stock_type = -1
+
+		# Aisles of the store sorted by x
+		self.aisles = []
+
+		# X coordinates of the aisles in the same order for bisecting
+		self.aisle_xs = []
+
+		# List of self-checkout registers
+		self.checkouts = []
+
+		# Waypoints for NPCs, created once the store is furnished
+		self.navigation = None
+
+	# Adds the aisle in order of its x coordinate
+	def add_aisle(self, aisle):
+		index = bisect.bisect_right(self.aisle_xs, aisle.x)
+		self.aisle_xs.insert(index, aisle.x)
+		self.aisles.insert(index, aisle)
+		aisle.store = self
+
+	# Returns list of aisles whose x coordinate is between the parameters
+	# (exclusive), sorted by x
+	def get_aisles(self, min_x, max_x):
+		start = bisect.bisect_right(self.aisle_xs, min_x)
+		end = bisect.bisect_left(self.aisle_xs, max_x)
+		return self.aisles[start:end]
+
+	# Places the supply in the free slot of the aisle's shelf
+	# and moves it to the position of the slot
+	def add_supply(self, supply, aisle, slot):
+		self.put_on_shelf(supply, aisle, slot)
+		self.ledger.move(supply.supply, None, self.ledger.shelves)
+
+	# Same as add_supply() for a supply taken out of the stock room
+	# with take_stock()
+	def place_stock(self, supply, aisle, slot):
+		self.put_on_shelf(supply, aisle, slot)
+		self.ledger.move(supply.supply, self.ledger.stocking,
+			self.ledger.shelves)
+
+	# Puts the supply in the slot without counting it in the ledger
+	def put_on_shelf(self, supply, aisle, slot):
+		aisle.slots[slot] = supply
+		supply.aisle = aisle
+		supply.slot = slot
+
+		supply.x = aisle.x
+		supply.y = aisle.get_slot_y(slot)
+
+	# Takes the supply off its shelf if it is on one,
+	# it is counted in the carts of the store until it is paid for
+	# or taken out of the store
+	def remove_supply(self, supply):
+		if supply.aisle == None:
+			return
+
+		supply.aisle.slots[supply.slot] = None
+		supply.aisle = None
+		supply.slot = -1
+
+		self.ledger.move(supply.supply, self.ledger.shelves, self.ledger.carts)
+		supply.store = self
+
+	# Returns list of supplies on the shelf of the aisle sorted by y,
+	# only the ones of the parameter supply type if provided
+	def get_supplies(self, aisle, supply_type = None):
+		if supply_type != None:
+			return [supply for supply in aisle.slots
+				if supply != None and supply.supply == supply_type]
+
+		return [supply for supply in aisle.slots if supply != None]
+
+	# Puts a supply of the type in the stock room
+	def add_stock(self, supply_type):
+		self.ledger.move(supply_type, None, self.ledger.stockroom)
+
+	# Puts a supply taken out of the stock room with take_stock() back
+	def return_stock(self, supply_type):
+		self.ledger.move(supply_type, self.ledger.stocking,
+			self.ledger.stockroom)
+
+	# Takes a supply out of the stock room, the next type after
+	# the last one taken that is in stock
+	# It is counted as being stocked until placed with place_stock()
+	# or put back with return_stock()
+	# Returns its supply type, or None if the stock room is empty
+	def take_stock(self):
+		num_types = len(SupplyType.supply_strs)
+
+		for offset in range(1, num_types + 1):
+			supply_type = (self.last_stock_type + offset) % num_types
+			if self.ledger.get_stockroom_count(supply_type) > 0:
+				self.ledger.move(supply_type, self.ledger.stockroom,
+					self.ledger.stocking)
+				self.last_stock_type = supply_type
+				return supply_type
+
+		return None
+
+	# Returns the number of supplies in the stock room
+	def get_stock_size(self):
+		return sum(self.ledger.stockroom.values())
+
+	# Returns how long the store is open during the time span,
+	# which can cover several days
+	# Parameters: game time the time span starts at and its length: minutes
+	def get_open_minutes(self, start_time, length):
+		end_time = start_time + length
+		open_minutes = 0
+
+		day_start = start_time - start_time % 1440
+		while day_start < end_time:
+			open_minutes += max(0, min(end_time, day_start + self.close_time)
+				- max(start_time, day_start + self.open_time))
+			day_start += 1440
+
+		return open_minutes
+
+	def add_checkout(self, checkout):
+		self.checkouts.append(checkout)
+		checkout.store = self
+
+	# Creates the waypoints for NPCs from the current aisles,
+	# doors and checkouts
+	def create_navigation(self):
+		self.navigation = StoreNavigation(self)
+
+# Number of supplies of each type in each part of a store, so that
+# availability can be read without looking at the supplies themselves
+class StockLedger:
+	def __init__(self):
+		# <SupplyType, int>
+
+		# Supplies on the shelves of the aisles
+		self.shelves = {}
+
+		# Supplies in the stock room
+		self.stockroom = {}
+
+		# Supplies taken out of the stock room that stockers
+		# have not placed on the shelves yet
+		self.stocking = {}
+
+		# Supplies taken off the shelves that have not been paid for
+		# or taken out of the store yet, carried or in a shopping cart
+		self.carts = {}
+
+	# Moves the quantity of supplies of the type from one count to another
+	# Either count can be None for supplies entering or leaving the store
+	def move(self, supply_type, source, destination, quantity = 1):
+		if source != None:
+			source[supply_type] = source.get(supply_type, 0) - quantity
+		if destination != None:
+			destination[supply_type] = destination.get(supply_type, 0)\
+				+ quantity
+
+	def get_shelf_count(self, supply_type):
+		return self.shelves.get(supply_type, 0)
+
+	def get_stockroom_count(self, supply_type):
+		return self.stockroom.get(supply_type, 0)
+
+	def get_stocking_count(self, supply_type):
+		return self.stocking.get(supply_type, 0)
+
+	def get_cart_count(self, supply_type):
+		return self.carts.get(supply_type, 0)
+
+# Shoppers and stockers of a store that is not simulated in detail,
+# kept as numbers so that they cost nothing between updates
+class AbstractStore:
+	# Parameter: time the store stopped being simulated in detail: ms
+	def __init__(self, time):
+		# Shoppers in the store in the order they leave: the time they
+		# leave (ms) and their record, None for shoppers that arrived
+		# while the store was simulated abstractly
+		# <(float, CivilianRecord)>
+		self.shoppers = collections.deque()
+
+		# Records of the stockers working in the store
+		self.stockers = []
+
+		# Supplies the stockers are partway through placing
+		self.placing_progress = 0.0
+
+		# Last time the store was updated: ms
+		self.last_update = time
+
+# Precomputed coordinates that shoppers and stockers move between,
+# so that they do not compare themselves against every aisle each update
+# All the aisles of a store start and end at the same y coordinates
+class StoreNavigation:
+	def __init__(self, store):
+		# Top and bottom of the aisles, the center corridor
+		# of the store is below the aisles: px
+		self.aisle_top_y = store.aisles[0].y
+		self.aisle_bottom_y = store.aisles[0].y + store.aisles[0].height
+
+		# X coordinate of the rightmost aisle: px
+		self.last_aisle_x = store.aisles[-1].x
+
+		# X coordinates where an NPC walking right along the center corridor
+		# turns into an aisle of each type, sorted: px
+		# <int, [float]>
+		self.aisle_turn_xs = {}
+
+		# Same as above, but without the wider center aisles
+		# that stockers do not stock
+		# <int, [float]>
+		self.stocker_aisle_turn_xs = {}
+
+		for aisle in store.aisles:
+			turn_x = aisle.x + GroceryStore.aisle_spacing / 2
+
+			self.aisle_turn_xs.setdefault(aisle.supplies, []).append(turn_x)
+			if aisle.width <= Supply.default_width:
+				self.stocker_aisle_turn_xs.setdefault(
+					aisle.supplies, []).append(turn_x)
+
+		# Widest aisle, for finding the aisles next to an NPC: px
+		self.max_aisle_width = max(aisle.width for aisle in store.aisles)
+
+		# X coordinates where shoppers are aligned with an exit door: px
+		self.exit_xs = [door.x - door.width for door in store.doors]
+
+		# Y coordinate of the highest checkout register: px
+		self.checkout_y = min(checkout.y for checkout in store.checkouts)
+
+		# X coordinate stockers have to reach to get to the stockroom: px
+		self.stockroom_x = store.x + Door.default_width * 2
+
+	# Returns the x coordinates where NPCs turn into an aisle of the type
+	def get_aisle_turn_xs(self, aisle_type, stocker = False):
+		if stocker:
+			return self.stocker_aisle_turn_xs.get(aisle_type, ())
+		return self.aisle_turn_xs.get(aisle_type, ())
+
+class GroceryStore(Store):
+	__slots__ = ()
 
-class GroceryStore(Location):
 	# Default values:
 
 	# Dimensions
@@ -127,18 +389,25 @@ class GroceryStore(Location):
 	# Time the store closes
 	close_time = 22 * 60 # minutes
 
-	def __init__(self, x, y, width, height, texture, facade_texture):
-		Location.__init__(self, x, y, width, height, texture,
-			facade_texture, "Grocery Store", LocationType.GROCERY_STORE)
+	# Average time a shopper spends in the store, measured
+	shopper_visit_time = 86000 # ms
+
+	# Chance that a shopper leaves with a supply, measured
+	shopper_purchase_chance = 40 # %
+
+	name = 'Grocery Store'
 
-		# List of supply object thestore has in its stock room
-		self.stockroom = []
+	def __init__(self, x, y, width, height, texture, facade_texture):
+		Store.__init__(self, x, y, width, height, texture,
+			facade_texture, LocationType.GROCERY_STORE)
 
 	def is_open(self, game_time):
 		return game_time > GroceryStore.open_time\
 			and game_time < GroceryStore.close_time
 		
-class GasStation(Location):
+class GasStation(Store):
+	__slots__ = ()
+
 	# Default values:
 
 	# Dimensions
@@ -165,18 +434,29 @@ class GasStation(Location):
 	# Time the store closes
 	close_time = 23 * 60 # minutes
 
-	def __init__(self, x, y, width, height, texture, facade_texture):
-		Location.__init__(self, x, y, width, height, texture,
-			facade_texture, "Gas Station", LocationType.GAS_STATION)
+	# Average time a shopper spends in the store, measured
+	shopper_visit_time = 33000 # ms
+
+	# Chance that a shopper leaves with a supply, measured
+	shopper_purchase_chance = 15 # %
 
-		# List of supply object thestore has in its stock room
-		self.stockroom = []
+	name = 'Gas Station'
+
+	def __init__(self, x, y, width, height, texture, facade_texture):
+		Store.__init__(self, x, y, width, height, texture,
+			facade_texture, LocationType.GAS_STATION)
 
 	def is_open(self, game_time):
 		return game_time > GasStation.open_time\
 			and game_time < GasStation.close_time
 
 class MapElement(Entity):
+	__slots__ = ('type',)
+
+	# Whether the element blocks player movement,
+	# overridden by each map element type
+	is_collidable = False
+
 	# Default method
 	# Block player movement if moving towards the element
 	def handle_collision(self, player):
@@ -194,14 +474,58 @@ class MapElement(Entity):
 			player.block_movement()
 
 class Aisle(MapElement):
+	__slots__ = ('supplies', 'store', 'slots', 'slot_spacing')
+
+	is_collidable = True
+
 	def __init__(self, x, y, width, height, texture):
 		Entity.__init__(self, x, y, width, height, texture)
 		self.type = MapElementType.AISLE
 		self.supplies = 0
 
-		self.is_collidable = True
+		# Store the aisle is in
+		self.store = None
+
+		# Supply in each position of the shelf from top to bottom,
+		# None if the position is free
+		self.slots = []
+
+		# Distance between the positions: px
+		self.slot_spacing = 0
+
+	# Creates the free positions of the shelf
+	def create_slots(self, num_slots, spacing):
+		self.slots = [None] * num_slots
+		self.slot_spacing = spacing
+
+	# Returns the y coordinate of the position
+	def get_slot_y(self, slot):
+		return self.y + slot * self.slot_spacing
+
+	# Returns the free position closest to the y coordinate
+	# that is at most the maximum distance away, -1 if there is none
+	def get_free_slot(self, y, max_distance):
+		if len(self.slots) == 0:
+			return -1
+
+		closest = int(round((y - self.y) / self.slot_spacing))
+		reach = int(max_distance // self.slot_spacing) + 1
+
+		# Check the closest slot first, then further and further away
+		for distance in range(reach + 1):
+			for slot in (closest - distance, closest + distance):
+				if slot < 0 or slot >= len(self.slots)\
+				or self.slots[slot] != None:
+					continue
+
+				if abs(self.get_slot_y(slot) - y) <= max_distance:
+					return slot
+
+		return -1
 
 class Road(MapElement):
+	__slots__ = ()
+
 	# Default values:
 
 	# Dimensions
@@ -213,9 +537,9 @@ class Road(MapElement):
 		Entity.__init__(self, x, y, width, height, texture)
 		self.type = MapElementType.ROAD
 
-		self.is_collidable = False
-
 class Sidewalk(MapElement):
+	__slots__ = ()
+
 	# Default values:
 
 	# Dimensions
@@ -225,36 +549,40 @@ class Sidewalk(MapElement):
 		Entity.__init__(self, x, y, width, height, texture)
 		self.type = MapElementType.SIDEWALK
 
-		self.is_collidable = False
-
 class Counter(MapElement):
+	__slots__ = ()
+
 	# Default values:
 
 	# Dimensions
 	default_width = 40 # px
 
+	is_collidable = True
+
 	def __init__(self, x, y, width, height, texture):
 		Entity.__init__(self, x, y, width, height, texture)
 		self.type = MapElementType.COUNTER
 
-		self.is_collidable = True
-
 class Desk(MapElement):
+	__slots__ = ()
+
 	# Default values:
 
 	# Dimensions
 	default_width = 40 # px
 	default_height = 120 # px
 
+	is_collidable = True
+
 	def __init__(self, x, y, width, height, texture):
 		Entity.__init__(self, x, y, width, height, texture)
 		self.type = MapElementType.DESK
 
-		self.is_collidable = True
-
 # No relation to facade design pattern
 
 class Facade(Entity):
+	__slots__ = ('visible',)
+
 	def __init__(self, x, y, width, height, texture):
 		Entity.__init__(self, x, y, width, height, texture)
 
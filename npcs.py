@@ -7,32 +7,63 @@ from enums import (
 	PetType,
 	CharacterType,
 	AisleType,
-	MapElementType
+	MapElementType,
+	ShopperState,
+	StockerState
 )
-from entity import Entity, MovableEntity
+from entity import Entity, MovableEntity, Handle
 from locations import GroceryStore
-from items import Supply, Door
 
 # Similar to Item, but also has abstract update function
 
 class Character(MovableEntity):
+	__slots__ = ('type', 'name', 'last_interaction', 'removed',
+		'item_being_carried', 'state')
+
 	# Minimum time between interact actions
 	action_interval = 500 # ms
 
-	def __init__(self, x, y, width, height, texture, type, name, 
-		interaction_message, speed):
+	# Shown to the player when nearby, overridden by each character type
+	interaction_message = ''
+
+	# Method called each update in each state, and the method called
+	# when a character enters each state (or None), for the character types
+	# that are state machines
+	state_handlers = None
+	state_entry_hooks = None
+
+	def __init__(self, x, y, width, height, texture, type, name, speed):
 		MovableEntity.__init__(self, x, y, width, height, texture, speed)
 		self.type = type
 
 		self.name = name
-		self.interaction_message = interaction_message
 
 		# Last time the player interacted with the character: ms
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
 
 		# If true, the controller will remove this entity from the game
 		self.removed = False
 
+		# Item the character is carrying
+		# None if the character is not carrying anything
+		self.item_being_carried = None
+
+		# Current state for the character types that are state machines
+		self.state = None
+
+	# Moves the character to the state and calls the state's entry hook
+	# None takes a removed character out of its state
+	def set_state(self, state):
+		if self.state_entry_hooks == None:
+			return
+
+		self.state = state
+
+		if state != None:
+			entry_hook = self.state_entry_hooks[state]
+			if entry_hook != None:
+				entry_hook(self)
+
 	# Default method:
 	# Block player movement if moving towards the character
 	def handle_collision(self, player):
@@ -60,6 +91,12 @@ class Character(MovableEntity):
 	def update(self, entities):
 		pass
 
+	# Abstract method for the character types that are state machines:
+	# What the character does each frame regardless of its state
+	# Returns true if the state handler should run this frame
+	def prepare_update(self, entities):
+		return False
+
 	# Returns true if the player is in close
 	# proximity to this character
 	def in_proximity(self, player):
@@ -71,10 +108,12 @@ class Character(MovableEntity):
 
 	# Same as Item.check_action_interval()
 	def check_action_interval(self):
-		return sdl2.SDL_GetTicks() - self.last_interaction\
+		return self.clock.get_ticks() - self.last_interaction\
 			> Character.action_interval
 
 class Pet(Character):
+	__slots__ = ('last_pet', 'health')
+
 	# Default values:
 
 	# Dimensions
@@ -94,8 +133,7 @@ class Pet(Character):
 
 	def __init__(self, x, y, name, texture):
 		Character.__init__(self, x, y, Pet.default_width, Pet.default_height,
-			texture, CharacterType.PET, name, Pet.interaction_message,
-			Pet.default_speed)
+			texture, CharacterType.PET, name, Pet.default_speed)
 
 		# Last time the player pet the animal
 		self.last_pet = -Pet.pet_interval
@@ -109,11 +147,11 @@ class Pet(Character):
 	def handle_interaction(self, player, messages):
 		if not self.check_action_interval():
 			return
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = self.clock.get_ticks()
 
-		if sdl2.SDL_GetTicks() - self.last_pet > Pet.pet_interval:
+		if self.clock.get_ticks() - self.last_pet > Pet.pet_interval:
 			player.morale += Pet.petting_morale_boost
-			self.last_pet = sdl2.SDL_GetTicks()
+			self.last_pet = self.clock.get_ticks()
 			messages.append('Morale increased from petting '\
 				+ self.name.lower())
 		# Pet ability needs to cooldown
@@ -134,6 +172,8 @@ class Pet(Character):
 
 # Abstract class for civilian types
 class Civilian(Character):
+	__slots__ = ('infected', 'infected_time', 'wearing_mask', 'home')
+
 	# Default values:
 
 	# Dimensions
@@ -149,13 +189,16 @@ class Civilian(Character):
 	# Chance of becoming infected
 	default_infection_chance = 75 # %
 
+	# Chance of wearing a mask
+	default_mask_chance = 40 # %
+
 	interaction_message = 'interact (E)'
 	
 	# TO DO: implement personality later
 	def __init__(self, x, y, name, texture, personality = None):
 		Character.__init__(self, x, y, Civilian.default_width,
 			Civilian.default_height, texture, CharacterType.PET, name,
-			Civilian.interaction_message, Civilian.default_speed)
+			Civilian.default_speed)
 
 		# Randomly generate some attributes for variety
 		
@@ -173,6 +216,18 @@ class Civilian(Character):
 		self.infected = random.randrange(0, 100)\
 			<= Civilian.default_infection_chance
 
+		# Time the civilian was infected by another civilian: ms
+		# -1 if the civilian was not
+		self.infected_time = -1
+
+		# Whether the civilian is wearing a mask
+		self.wearing_mask = random.randrange(0, 100)\
+			< Civilian.default_mask_chance
+
+		# Index of the neighborhood the civilian lives in
+		# -1 if the civilian does not come from a neighborhood
+		self.home = -1
+
 	def handle_collision(self, player):
 		Character.handle_collision(self, player)
 		
@@ -191,12 +246,18 @@ class Civilian(Character):
 	def update(self, entities):
 		pass
 
+	# Infects the civilian, called when another civilian infected them
+	def infect(self):
+		self.infected = True
+		self.infected_time = self.clock.get_ticks()
+
 	# Returns the location that civilian is at
 	def attach_location(self, entities):
-		for location in entities.locations:
-			if location.check_collision(self):
-				return location
-		return None
+		locations = entities.location_tree.query(self.x, self.y,
+			self.width, self.height)
+		if len(locations) == 0:
+			return None
+		return locations[0]
 
 	# Renders the character at with render height
 	def render(self, renderer, camera_x, camera_y):
@@ -205,7 +266,30 @@ class Civilian(Character):
 		int(self.y - camera_y - self.height), int(self.width),
 		int(Civilian.render_height)), 0, None, sdl2.SDL_FLIP_NONE)
 
+# Attributes of a civilian that outlast the character, kept while the
+# civilian is not simulated as one, e.g. while its store is simulated
+# with an abstract model
+class CivilianRecord:
+	__slots__ = ('home', 'infected', 'infected_time', 'wearing_mask')
+
+	def __init__(self, civilian):
+		self.home = civilian.home
+		self.infected = civilian.infected
+		self.infected_time = civilian.infected_time
+		self.wearing_mask = civilian.wearing_mask
+
+	# Gives the recorded attributes back to a civilian
+	def restore(self, civilian):
+		civilian.home = self.home
+		civilian.infected = self.infected
+		civilian.infected_time = self.infected_time
+		civilian.wearing_mask = self.wearing_mask
+
 class Shopper(Civilian):
+	__slots__ = ('pausing', 'pacing', 'random_movement_start', 'pausing_time',
+		'pacing_distance', 'aisle_center', 'next_aisle', 'store',
+		'target_aisle', 'target_item', 'item_to_pick_up')
+
 	# Interval that shopper may decide to do a random movement
 	random_movement_interval = 20000 # ms
 
@@ -223,29 +307,7 @@ class Shopper(Civilian):
 	def __init__(self, x, y, name, texture, personality = None):
 		Civilian.__init__(self, x, y, name, texture, personality)
 
-		# States:
-		# Shopper is at the entrance of the store and just started shopping
-		self.at_entrance = True
-
-		# Shopper is at the center corridor of the store,
-		# looking for the target aisle
-		self.at_center = False
-
-		# Shopper is at the end of the center corridor
-		# and could not find the target aisle
-		self.at_store_end = False
-
-		# Shopper is the target aisle, looking for the target item
-		self.at_aisle = False
-
-		# Shopper is at the end of the aisle and could not find the target item
-		self.at_aisle_end = False
-
-		# Shopper found the target item and is picking it up
-		self.at_item = False
-
-		# Shopper found a door and is exiting the store
-		self.at_exit = False
+		# Random movements, done on top of the current state:
 
 		# Shopper is standing ground
 		self.pausing = False
@@ -273,10 +335,10 @@ class Shopper(Civilian):
 		# so that the shopper can go back to it after picking up an item
 		self.aisle_center = 0
 
-		# Keeps track of the aisles the shopper has visited
+		# Index of the next target aisle the shopper has not visited
 		# when searching for the target item
 		# so that the shopper does not visit the same aisle twice
-		self.visited_aisles = []
+		self.next_aisle = 0
 
 		# Location reference that the shopper is at
 		self.store = None
@@ -291,12 +353,12 @@ class Shopper(Civilian):
 
 		# Items:
 
-		# Item the shopper is currently holding
-		self.item_being_carried = None
-
-		# Item the shopper found and is going to pick up
+		# Handle to the item the shopper found and is going to pick up
 		self.item_to_pick_up = None
 
+		# Shopper is at the entrance of the store and just started shopping
+		self.set_state(ShopperState.ENTRANCE)
+
 	def handle_collision(self, player):
 		Character.handle_collision(self, player)
 		
@@ -304,8 +366,20 @@ class Shopper(Civilian):
 	def handle_interaction(self, player, messages):
 		pass
 
+	# Reinitializes a removed shopper so that it can be reused
+	# Keeps the generation so that handles to the removed shopper stay invalid
+	def reset(self, x, y, name, texture, personality = None):
+		generation = self.generation
+		Shopper.__init__(self, x, y, name, texture, personality)
+		self.generation = generation
+
 	# Performs actions based on the current state
 	def update(self, entities):
+		if self.prepare_update(entities):
+			StateGroup(entities, self).update()
+
+	# Moves the shopper and does its random movements
+	def prepare_update(self, entities):
 		self.update_position()
 
 		if self.item_being_carried != None:
@@ -314,143 +388,127 @@ class Shopper(Civilian):
 		if self.store == None:
 			self.store = self.attach_location(entities)
 
+			# Look for something else if the target item is sold out
+			if self.store != None and self.store.ledger.get_shelf_count(
+				self.target_item) == 0:
+				self.target_item = self.pick_random_target_item(
+					self.store.ledger)
+
 		self.random_movement()
 
 		if self.pausing:
 			self.pause()
-			return
+			return False
 		elif self.pacing:
 			self.pace(entities)
-			return
+			return False
+
+		return True
+
+	# Entry hooks:
 
-		if self.at_entrance:
-			self.visited_aisles.clear()
-			self.go_to_center(entities)
-		elif self.at_exit:
-			self.go_to_door(entities)
-		elif self.at_center:
-			self.go_to_aisle(entities)
-		elif self.at_store_end:
-			self.find_door(entities)
-		elif self.at_aisle:
-			self.go_to_item(entities)
-		elif self.at_aisle_end:
-			self.go_to_center(entities)
-		elif self.at_item:
-			self.pick_up_item(entities)
+	# Starts searching from the first aisle
+	def enter_entrance(self):
+		self.next_aisle = 0
+
+	# Remembers the center of the aisle to go back to
+	def enter_item(self):
+		self.aisle_center = self.x
 
 	# Goes to the center of the store
-	def go_to_center(self, entities):
+	def go_to_center(self, group):
 		self.x_velocity = 0
 
-		if self.at_aisle_end:
+		leaving_aisle = self.state == ShopperState.AISLE_END
+		if leaving_aisle:
 			self.y_velocity = self.speed
 		else:
 			self.y_velocity = -self.speed
 
 		# Check if shopper arrived at the center
-		for aisle in entities.map_elements:
-			if aisle.type != MapElementType.AISLE:
-				continue
-
-			# Only check aisles in this store
-			if not aisle.check_collision(self.store):
-				continue
+		navigation = self.store.navigation
 
-			# Shopper approaching center from the top of the store
-			if self.at_aisle_end and self.y\
-			> (aisle.y + aisle.height):
-				self.at_entrance = False
-
-				# Shopper has not found item yet
-				if self.item_being_carried == None:
-					self.at_center = True
-				# Shopper is done shopping
-				else:
-					self.at_store_end = True
-			# Shopper approaching center from the bottom of the store
-			elif not self.at_aisle_end and self.y\
-				< (aisle.y + aisle.height + self.height * 2):
-				self.at_entrance = False
-				self.at_center = True
+		# Shopper approaching center from the top of the store
+		if leaving_aisle and self.y > navigation.aisle_bottom_y:
+			# Shopper has not found item yet
+			if self.item_being_carried == None:
+				self.set_state(ShopperState.CENTER)
+			# Shopper is done shopping
+			else:
+				self.set_state(ShopperState.STORE_END)
+		# Shopper approaching center from the bottom of the store
+		elif not leaving_aisle and self.y\
+			< navigation.aisle_bottom_y + self.height * 2:
+			self.set_state(ShopperState.CENTER)
 			
 	# Goes from the center of the store to the target aisle
 	# and checks if the store does not have the target aisle
-	def go_to_aisle(self, entities):
+	def go_to_aisle(self, group):
 		self.x_velocity = self.speed
 		self.y_velocity = 0
 
-		past_all_aisles = True
-		for aisle in entities.map_elements:
-			if aisle.type != MapElementType.AISLE:
-				continue
-
-			# Only check aisles in this store
-			if not aisle.check_collision(self.store):
-				continue
-
-			# Check if shopper found the target aisle
-			if aisle.supplies == self.target_aisle:
-				# Check if shopper already visited this aisle
-				if aisle in self.visited_aisles:
-					continue
+		navigation = self.store.navigation
+		turn_xs = navigation.get_aisle_turn_xs(self.target_aisle)
 
-				if self.x > aisle.x + GroceryStore.aisle_spacing / 2:
-					# Keep track of the aisles the shopper has visited
-					self.visited_aisles.append(aisle)
+		# Check if shopper found the next target aisle it has not visited
+		while self.next_aisle < len(turn_xs)\
+		and self.x > turn_xs[self.next_aisle]:
+			# Keep track of the aisles the shopper has visited
+			self.next_aisle += 1
 
-					self.at_center = False
-					self.at_aisle = True
+			self.set_state(ShopperState.AISLE)
 
-			# Check if shopper past all aisles
-			if aisle.x > self.x:
-				past_all_aisles = False
-
-		if past_all_aisles:
-			self.at_center = False
-			self.at_store_end = True
+		# Check if shopper past all aisles
+		if self.x >= navigation.last_aisle_x:
+			self.set_state(ShopperState.STORE_END)
 
 	# Once at the target aisle, searches for the target item
 	# and checks if the aisle does not have the target item
-	def go_to_item(self, entities):
+	def go_to_item(self, group):
 		self.x_velocity = 0
 		self.y_velocity = -self.speed
 
 		past_all_items = True
-		for item in entities.items:
-			# Only check supplies
-			if item.type != ItemType.SUPPLY:
-				continue
 
-			# Only check items in this store
-			if not item.check_collision(self.store):
-				continue
+		# Target item is not on any shelf of the store
+		sold_out = group.get_shelf_count(self.target_item) == 0
 
-			# Only check items on shelves (not being carried by someone else)
-			if item.being_carried:
-				continue
+		# Only check the shelves next to the shopper
+		for aisle in self.store.get_aisles(
+			self.x - GroceryStore.aisle_spacing / 2,
+			self.x + GroceryStore.aisle_spacing / 2):
 
 			# Check if shopper past all items
-			if item.y < self.y:
+			top_y = group.get_top_supply_y(aisle)
+			if top_y != None and top_y < self.y:
 				past_all_items = False
 
-			# Check if shopper found the target item
-			if item.supply == self.target_item\
-			and abs(self.x - item.x) < GroceryStore.aisle_spacing / 2:
-				if item.y + item.height > self.y + self.width / 2:
-					self.item_to_pick_up = item
-					self.at_aisle = False
-					self.at_item = True
-					self.aisle_center = self.x
+			if sold_out:
+				continue
+
+			for item in group.get_supplies(aisle, self.target_item):
+				# Check if shopper found the target item
+				if abs(self.x - item.x) < GroceryStore.aisle_spacing / 2\
+				and item.y + item.height > self.y + self.width / 2:
+					self.item_to_pick_up = Handle(item)
+					self.set_state(ShopperState.ITEM)
 
 		if past_all_items:
-			self.at_aisle = False
-			self.at_aisle_end = True
+			self.set_state(ShopperState.AISLE_END)
 
 	# Once at the target item, moves to the item and picks it up,
 	# then moves back to the center of the aisle
-	def pick_up_item(self, entities):
-		if self.item_to_pick_up.x > self.x:
+	def pick_up_item(self, group):
+		item_to_pick_up = self.item_to_pick_up.get()
+
+		# Check if someone else picked up the item or it was removed
+		if self.item_being_carried == None\
+		and (item_to_pick_up == None or item_to_pick_up.being_carried):
+			self.set_state(ShopperState.AISLE_END)
+			self.item_to_pick_up = None
+			return
+
+		if item_to_pick_up.x > self.x:
 			self.x_velocity = self.speed
 		else:
 			self.x_velocity = -self.speed
@@ -459,31 +517,24 @@ class Shopper(Civilian):
 		# Shopper picked up item and is back in the center of the aisle
 		if self.item_being_carried != None\
 			and abs(self.x - self.aisle_center) < self.width:
-			self.at_item = False
-			self.at_aisle_end = True
-			return
-
-		# Check if someone else picked up the item
-		if self.item_being_carried == None\
-		and self.item_to_pick_up.being_carried:
-			self.at_item = False
-			self.at_aisle_end = True
-			self.item_to_pick_up = None
+			self.set_state(ShopperState.AISLE_END)
 			return
 
 		# Check if is touching the item
-		if self.item_to_pick_up.check_collision(self):
+		if item_to_pick_up.check_collision(self):
 			if self.aisle_center > self.x:
 				self.x_velocity = self.speed
 			else:
 				self.x_velocity = -self.speed
 
 			self.y_velocity = 0
-			self.item_being_carried = self.item_to_pick_up
+			self.item_being_carried = item_to_pick_up
 			self.item_being_carried.being_carried = True
+			self.item_being_carried.touch(self)
+			self.store.remove_supply(self.item_being_carried)
 
 	# Once at the center, searches for a door to exit the store
-	def find_door(self, entities):
+	def find_door(self, group):
 		# Grocery store exit door is on the right
 		if self.store.type == LocationType.GROCERY_STORE:
 			self.x_velocity = self.speed
@@ -493,27 +544,20 @@ class Shopper(Civilian):
 			self.x_velocity = -self.speed
 
 		# Shopper is at the store end, so they will have to go left regardless
-		if self.at_store_end:
+		if self.state == ShopperState.STORE_END:
 			self.x_velocity = -self.speed
 
 		self.y_velocity = 0
 
-		for door in entities.items:
-			if door.type != ItemType.DOOR:
-				continue
-
-			# Only check doors in this store
-			if not door.check_collision(self.store):
-				continue
-
+		for door, exit_x in enumerate(self.store.navigation.exit_xs):
 			# Check if shopper arrived at a door
-			if abs(door.x - door.width - self.x) < self.width:
-				self.at_store_end = False
-				self.at_exit = True
+			if abs(exit_x - self.x) < self.width:
+				self.set_state(ShopperState.EXIT)
+				self.store.doors[door].touch(self)
 
 	# Once aligned with the door on the x-axis,
 	# moves down until the shopper is out of the store, then gets removed
-	def go_to_door(self, entities):
+	def go_to_door(self, group):
 		self.x_velocity = 0
 		self.y_velocity = self.speed
 
@@ -524,18 +568,18 @@ class Shopper(Civilian):
 				self.item_being_carried.removed = True
 
 	# Picks a random target item depending on their target aisle type
-	def pick_random_target_item(self):
-		valid_supply_types = []
-		
+	# Only picks items that are on the shelves if the ledger of the store
+	# is provided and any of them are
+	def pick_random_target_item(self, ledger = None):
 		# Determine valid supplies depending on target aisle type
-		if self.target_aisle == AisleType.GROCERIES:
-			valid_supply_types.append(SupplyType.FOOD)
-		elif self.target_aisle == AisleType.TOILETRIES:
-			valid_supply_types.append(SupplyType.SOAP)
-			valid_supply_types.append(SupplyType.HAND_SANITIZER)
-			valid_supply_types.append(SupplyType.TOILET_PAPER)
-		elif self.target_aisle == AisleType.PET_SUPPLIES:
-			valid_supply_types.append(SupplyType.PET_SUPPLIES)
+		valid_supply_types = AisleType.get_supply_types(self.target_aisle)
+
+		if ledger != None:
+			available_supply_types = [supply_type
+				for supply_type in valid_supply_types
+				if ledger.get_shelf_count(supply_type) > 0]
+			if len(available_supply_types) > 0:
+				valid_supply_types = available_supply_types
 
 		# Pick random item from valid items
 		random_int = random.randrange(0, len(valid_supply_types))
@@ -543,14 +587,14 @@ class Shopper(Civilian):
 
 	# Halts the shopper until the pausing time has passed
 	def pause(self):
-		if self.pausing_time < sdl2.SDL_GetTicks()\
+		if self.pausing_time < self.clock.get_ticks()\
 		- self.random_movement_start:
 			self.pausing = False
 		else:
 			self.x_velocity = 0
 			self.y_velocity = 0
 			self.look_to_side()
-			self.last_moved = sdl2.SDL_GetTicks()
+			self.last_moved = self.clock.get_ticks()
 
 	# Make the shopper look to the left or right while holding an item
 	def look_to_side(self):
@@ -587,17 +631,10 @@ class Shopper(Civilian):
 
 		# Make sure the shopper does not go past the center of the store
 		# by checking its distance from the store's checkout registers
-		if self.at_aisle:
-			for checkout in entities.items:
-				if checkout.type != ItemType.SELF_CHECKOUT:
-					continue
-
-				if not checkout.check_collision(self.store):
-					continue
-
-				if self.y + self.height * 3 > checkout.y:
-					self.pacing = False
-					return
+		if self.state == ShopperState.AISLE:
+			if self.y + self.height * 3 > self.store.navigation.checkout_y:
+				self.pacing = False
+				return
 
 	# Randomly decides whether the shopper should do a random movement
 	# such as pausing or pacing
@@ -607,17 +644,19 @@ class Shopper(Civilian):
 			return
 
 		# Only decide every random movement interval
-		if Shopper.random_movement_interval > sdl2.SDL_GetTicks()\
+		if Shopper.random_movement_interval > self.clock.get_ticks()\
 		- self.random_movement_start:
 			return
 
 		# Randomly generate probability
 		# Do not pause if picking up item from shelf or if at entrance/exit
 		random_int = random.randrange(0, 100)
-		if random_int < Shopper.pausing_probability and not self.at_item\
-		and not self.at_entrance and not self.at_exit:
+		if random_int < Shopper.pausing_probability\
+		and self.state != ShopperState.ITEM\
+		and self.state != ShopperState.ENTRANCE\
+		and self.state != ShopperState.EXIT:
 			self.pausing = True
-			self.random_movement_start = sdl2.SDL_GetTicks()
+			self.random_movement_start = self.clock.get_ticks()
 
 			# Randomly generate pausing time
 			self.pausing_time = random.randrange(Shopper.max_pausing_time / 4, 
@@ -625,9 +664,10 @@ class Shopper(Civilian):
 
 		# Only pace if the shopper is at an aislse or in the center
 		elif random_int < Shopper.pacing_probability\
-		and (self.at_aisle or self.at_center):
+		and (self.state == ShopperState.AISLE
+		or self.state == ShopperState.CENTER):
 			self.pacing = True
-			self.random_movement_start = sdl2.SDL_GetTicks()
+			self.random_movement_start = self.clock.get_ticks()
 
 			# Randomly generate pacing distance
 			self.pacing_distance = random.randrange(
@@ -649,25 +689,15 @@ class Shopper(Civilian):
 
 	# Returns str of the shopper's current state for debugging
 	def get_state(self):
-		if self.at_entrance:
-			return 'At entrance'
-		elif self.at_center:
-			return 'At center'
-		elif self.at_store_end:
-			return 'At store end'
-		elif self.at_aisle:
-			return 'At aisle'
-		elif self.at_aisle_end:
-			return 'At aisle end'
-		elif self.at_item:
-			return 'At item'
-		elif self.at_exit:
-			return 'At exit'
+		return ShopperState.state_strs[self.state]
 
 	# Same as MovableEntity.update_position()
 	# but also updates pacing distance
 	def update_position(self):
-		time_elapsed = sdl2.SDL_GetTicks() - self.last_moved
+		self.previous_x = self.x
+		self.previous_y = self.y
+
+		time_elapsed = self.clock.get_ticks() - self.last_moved
 		self.x += self.x_velocity * time_elapsed / 1000.0
 		self.y += self.y_velocity * time_elapsed / 1000.0
 
@@ -680,58 +710,69 @@ class Shopper(Civilian):
 			self.y -= self.y_velocity * time_elapsed / 1000.0
 			self.movement_blocked = False
 
-		self.last_moved = sdl2.SDL_GetTicks()
+		self.last_moved = self.clock.get_ticks()
+
+	# Method called each update in each state
+	# <ShopperState, function>
+	state_handlers = {
+		ShopperState.ENTRANCE: go_to_center,
+		ShopperState.CENTER: go_to_aisle,
+		ShopperState.STORE_END: find_door,
+		ShopperState.AISLE: go_to_item,
+		ShopperState.AISLE_END: go_to_center,
+		ShopperState.ITEM: pick_up_item,
+		ShopperState.EXIT: go_to_door
+	}
+
+	state_entry_hooks = {
+		ShopperState.ENTRANCE: enter_entrance,
+		ShopperState.CENTER: None,
+		ShopperState.STORE_END: None,
+		ShopperState.AISLE: None,
+		ShopperState.AISLE_END: None,
+		ShopperState.ITEM: enter_item,
+		ShopperState.EXIT: None
+	}
 
 class Stocker(Civilian):
+	__slots__ = ('placing_item_right', 'target_shelf', 'target_slot', 'store',
+		'target_aisle', 'aisle_center', 'next_aisle')
+
 	def __init__(self, x, y, name, texture, personality = None):
 		Civilian.__init__(self, x, y, name, texture, personality)
 
-		# States:
-
-		# Stocker is at the entrance of the stock room
-		self.at_stockroom = True
-
-		# Stocker is at the center corridor of the store,
-		# looking for the target aisle
-		self.at_center = False
-
-		# Stocker is at the end of the center corridor
-		# and could not find the target aisle
-		self.at_store_end = False
-
-		# Stocker is at the target, looking for a spot to place the item
-		self.at_aisle = False
-
-		# Stocker is at the end of the aisle and could not find a spot,
-		# or placed an item and is going back to the center
-		self.at_aisle_end = False
-
-		# Stocker found a spot and is placing the item
-		self.at_shelf = False
-
 		# Whether the stocker is placing the item to the left or right shelf
 		self.placing_item_right = False
 
+		# Aisle and position on its shelf the stocker is placing the item at
+		self.target_shelf = None
+		self.target_slot = -1
+
 		# Location reference that the stocker is at
 		self.store = None
 
 		# Aisle the stocker is trying to find
 		self.target_aisle = 0
 
-		# Item the stocker is currently holding
-		self.item_being_carried = None
-
 		# Temporary variable for setting to the aisle center
 		# so that the stocker can go back to it after placing an item
 		self.aisle_center = 0
 
-		# Keeps track of the aisles the stocker has visited
+		# Index of the next target aisle the stocker has not visited
 		# when searching for a spot so that the they do not 
 		# visit the same aisle twice
-		self.visited_aisles = []
+		self.next_aisle = 0
+
+		# Stocker is at the entrance of the stock room
+		self.set_state(StockerState.STOCKROOM)
 
 	# Performs actions based on the current state
 	def update(self, entities):
+		if self.prepare_update(entities):
+			StateGroup(entities, self).update()
+
+	# Moves the stocker and the item it carries
+	def prepare_update(self, entities):
 		self.update_position()
 
 		if self.item_being_carried != None:
@@ -740,149 +781,100 @@ class Stocker(Civilian):
 		if self.store == None:
 			self.store = self.attach_location(entities)
 
-		if self.at_store_end:
-			self.go_to_stockroom(entities)
-			return
-		if self.at_stockroom:
-			if self.item_being_carried == None:
-				self.item_being_carried = self.get_item()
-			self.go_to_center(entities)
-		elif self.at_center:
-			self.go_to_aisle(entities)
-		elif self.at_aisle:
-			self.at_aisle_end = False
-			self.go_to_spot(entities)
-		elif self.at_aisle_end:
-			self.go_to_center(entities)
-		elif self.at_shelf:
-			self.place_item(entities)
+		return True
+
+	# Entry hooks:
+
+	# Remembers the center of the aisle to go back to
+	def enter_shelf(self):
+		self.aisle_center = self.x
+
+	# Takes an item out of the stockroom if not carrying one yet,
+	# then heads to the center
+	def leave_stockroom(self, group):
+		if self.item_being_carried == None:
+			self.item_being_carried = self.get_item(group.entities)
+		self.go_to_center(group)
 
 	# 
-	def go_to_center(self, entities):
+	def go_to_center(self, group):
 		self.x_velocity = 0
 
 		# Stocker just placed an item and needs to grab a new one
-		if self.at_aisle_end:
+		leaving_aisle = self.state == StockerState.AISLE_END
+		if leaving_aisle:
 			self.y_velocity = -self.speed
 		else:
 			self.y_velocity = self.speed
 
 		# Check if stocker arrived at center
-		for aisle in entities.map_elements:
-			if aisle.type != MapElementType.AISLE:
-				continue
-
-			# Only check aisles in this store
-			if not aisle.check_collision(self.store):
-				continue
-
-			if not self.at_aisle_end\
-			and self.y + self.height * 1.5 > aisle.y:
-				self.at_stockroom = False
-				self.at_center = True
-				return
-			elif self.at_aisle_end\
-			and self.y - self.height / 2 < self.store.y\
-			+ GroceryStore.aisle_spacing / 2:
-				self.at_stockroom = False
-				self.at_center = True
-				return
+		if not leaving_aisle\
+		and self.y + self.height * 1.5 > self.store.navigation.aisle_top_y:
+			self.set_state(StockerState.CENTER)
+		elif leaving_aisle\
+		and self.y - self.height / 2 < self.store.y\
+		+ GroceryStore.aisle_spacing / 2:
+			self.set_state(StockerState.CENTER)
 
 	#
-	def go_to_aisle(self, entities):
+	def go_to_aisle(self, group):
 		# If the stocker is done placing an item, go back
 		# to the stockroom to get a new item
 		if self.item_being_carried == None:
-			self.go_to_stockroom(entities)
+			self.go_to_stockroom(group)
 			return
 
 		self.x_velocity = self.speed
 		self.y_velocity = 0
 
-		past_all_aisles = True
-		for aisle in entities.map_elements:
-			if aisle.type != MapElementType.AISLE:
-				continue
-
-			# Do not check middle aisles
-			if aisle.width > Supply.default_width:
-				continue
-
-			# Check if the stocker already visited this aisle
-			if aisle in self.visited_aisles:
-				continue
-
-			# Only check aisles in this store
-			if not aisle.check_collision(self.store):
-				continue
+		# Middle aisles are not checked
+		navigation = self.store.navigation
+		turn_xs = navigation.get_aisle_turn_xs(self.target_aisle, True)
 
-			# Check if stocker found the target aisle
-			if aisle.supplies == self.target_aisle\
-			and self.x > aisle.x + GroceryStore.aisle_spacing / 2:
-					self.at_center = False
-					self.at_aisle = True
-					self.visited_aisles.append(aisle)
+		# Check if stocker found the next target aisle it has not visited
+		while self.next_aisle < len(turn_xs)\
+		and self.x > turn_xs[self.next_aisle]:
+			self.next_aisle += 1
 
-			# Check if stocker past all aisles
-			if aisle.x > self.x:
-				past_all_aisles = False
+			self.set_state(StockerState.AISLE)
 
-		if past_all_aisles:
-			self.at_center = False
-			self.at_store_end = True
+		# Check if stocker past all aisles
+		if self.x >= navigation.last_aisle_x:
+			self.set_state(StockerState.STORE_END)
 
 	#
-	def go_to_spot(self, entities):
+	def go_to_spot(self, group):
 		self.x_velocity = 0
 		self.y_velocity = self.speed
 
-		for aisle in entities.map_elements:
-			if aisle.type != MapElementType.AISLE:
-				continue
-
-			# Only check aisles in this store
-			if not aisle.check_collision(self.store):
-				continue
-
-			# Check if stocker past the aisle
-			if self.y > aisle.y + aisle.height - self.height * 2:
-				self.at_aisle = False
-				self.at_aisle_end = True
-				return
-			else:
-				break
-
-		for item in entities.items:
-			# Only check supplies
-			if item.type != ItemType.SUPPLY:
-				continue
+		# Check if stocker past the aisle
+		if self.y > self.store.navigation.aisle_bottom_y - self.height * 2:
+			self.set_state(StockerState.AISLE_END)
+			return
 
-			# Do not check items being carried
-			if item.being_carried:
-				continue
+		# Check if there is a free spot on the shelves next to the stocker
+		max_distance = GroceryStore.aisle_spacing * 0.615
+		spots = []
+		for aisle in self.store.get_aisles(self.x - max_distance,
+			self.x + max_distance):
 
-			# Only check items in this store
-			if not item.check_collision(self.store):
-				continue
+			slot = aisle.get_free_slot(self.y, aisle.slot_spacing / 2)
+			if slot != -1:
+				spots.append((aisle, slot))
 
-			# Check if there is an empty spot in the aisle to place supply
-			if self.y > self.store.y + GroceryStore.aisle_spacing * 1.5:
-				distance = math.sqrt(abs(self.x - item.x) ** 2
-					+ abs(self.y - item.y) ** 2)
-				if distance < GroceryStore.aisle_spacing * 0.615:
-					return
-			else:
-				return
+		if len(spots) == 0:
+			return
 
-		self.at_aisle = False
-		self.at_shelf = True
-		self.aisle_center = self.x
+		self.set_state(StockerState.SHELF)
 
-		# Randomly decide if placing the item on the right or left shelf
-		self.placing_item_right = random.randrange(0, 2) == 1
+		# Randomly decide which shelf to place the item on
+		# if there are spots on both the right and left shelves
+		self.target_shelf, self.target_slot = spots[
+			random.randrange(0, len(spots))]
+		self.placing_item_right = self.target_shelf.x > self.x
 
 	#
-	def place_item(self, entities):
+	def place_item(self, group):
 		if (self.item_being_carried != None and self.placing_item_right)\
 		or (self.item_being_carried == None and not self.placing_item_right):
 			self.x_velocity = self.speed
@@ -894,100 +886,148 @@ class Stocker(Civilian):
 		# Check if stocker placed item and is back at the center of the aisle
 		if self.item_being_carried == None\
 		and abs(self.x - self.aisle_center) < self.width / 2:
-			self.at_shelf = False
-			self.at_aisle_end = True
+			self.set_state(StockerState.AISLE_END)
 			return
 
-		# Prevent stocker from placing item on top of another item
-		for item in entities.items:
-			if self.item_being_carried == None:
-				break
-
-			if item.type != ItemType.SUPPLY:
-				continue
-
-			if item == self.item_being_carried:
-				continue
-
-			if item.check_collision(self.item_being_carried):
-				self.at_shelf = False
-				self.at_aisle_end = True
-				return
-
-		for aisle in entities.map_elements:
-			if aisle.type != MapElementType.AISLE:
-				continue
+		if self.item_being_carried == None:
+			return
 
-			# Only check aisles in this store
-			if not aisle.check_collision(self.store):
-				continue
+		# Another NPC filled the spot first
+		if self.target_shelf.slots[self.target_slot] != None:
+			self.set_state(StockerState.AISLE_END)
+			return
 
-			# Check if stocker has reached the aisle
-			if aisle.check_collision(self)\
-			and self.item_being_carried != None:
-				self.item_being_carried.being_carried = False
-				self.item_being_carried = None
+		# Check if stocker has reached the aisle
+		if self.target_shelf.check_collision(self):
+			self.item_being_carried.being_carried = False
+			self.store.place_stock(self.item_being_carried, self.target_shelf,
+				self.target_slot)
+			group.entities.item_grid.move(self.item_being_carried)
+			self.item_being_carried = None
 
 	#
-	def go_to_stockroom(self, entities):
+	def go_to_stockroom(self, group):
 		self.x_velocity = -self.speed
 		self.y_velocity = 0
 
-		# Place item at the beginning of the stockroom list
+		# Put item back in the stockroom
 		# so the stocker can try placing it later
-		if self.at_store_end:
-			self.store.stockroom.insert(0, self.item_being_carried)
+		# and walk back along the center
+		if self.state == StockerState.STORE_END:
+			self.store.return_stock(self.item_being_carried.supply)
+			group.entities.remove_item(self.item_being_carried)
 
-			# Teleport item out of the map
-			self.item_being_carried.x = -10000
-			self.item_being_carried.y = -10000
-
-			self.item_being_carried.being_carried = False
 			self.item_being_carried = None
-			self.at_store_end = False
+			self.set_state(StockerState.CENTER)
 
 		if self.item_being_carried == None\
-		and self.x < self.store.x + Door.default_width * 2:
-			self.item_being_carried = self.get_item()
+		and self.x < self.store.navigation.stockroom_x:
+			self.item_being_carried = self.get_item(group.entities)
 
 			# No more items in the stockroom
 			if self.item_being_carried == None:
 				self.removed = True
 
-			self.at_center = True
-			self.at_aisle_end = False
+			self.set_state(StockerState.CENTER)
 
-	#
-	def get_item(self):
-		if len(self.store.stockroom) == 0:
+	# Takes a supply out of the stockroom and creates it
+	# Returns the supply, or None if the stockroom is empty
+	def get_item(self, entities):
+		supply_type = self.store.take_stock()
+		if supply_type == None:
 			return None
 
-		item = self.store.stockroom.pop()
+		item = entities.add_supply(supply_type, self.x, self.y,
+			entities.textures)
 		item.being_carried = True
-		self.visited_aisles.clear()
-
-		if item.supply == SupplyType.FOOD:
-			self.target_aisle = AisleType.GROCERIES
-		elif item.supply == SupplyType.SOAP\
-		or item.supply == SupplyType.HAND_SANITIZER\
-		or item.supply == SupplyType.TOILET_PAPER:
-			self.target_aisle = AisleType.TOILETRIES
-		elif item.supply == SupplyType.PET_SUPPLIES:
-			self.target_aisle = AisleType.PET_SUPPLIES
+		item.touch(self)
+		self.next_aisle = 0
+		self.target_aisle = AisleType.supply_aisles[item.supply]
 
 		return item
 
 	# Returns str of the stocker's current state for debugging
 	def get_state(self):
-		if self.at_stockroom:
-			return 'At stockroom'
-		elif self.at_center:
-			return 'At center'
-		elif self.at_store_end:
-			return 'At store end'
-		elif self.at_aisle:
-			return 'At aisle'
-		elif self.at_aisle_end:
-			return 'At aisle end'
-		elif self.at_shelf:
-			return 'At shelf'
\ No newline at end of file
+		return StockerState.state_strs[self.state]
+
+	# Method called each update in each state
+	# <StockerState, function>
+	state_handlers = {
+		StockerState.STOCKROOM: leave_stockroom,
+		StockerState.CENTER: go_to_aisle,
+		StockerState.STORE_END: go_to_stockroom,
+		StockerState.AISLE: go_to_spot,
+		StockerState.AISLE_END: go_to_center,
+		StockerState.SHELF: place_item
+	}
+
+	state_entry_hooks = {
+		StockerState.STOCKROOM: None,
+		StockerState.CENTER: None,
+		StockerState.STORE_END: None,
+		StockerState.AISLE: None,
+		StockerState.AISLE_END: None,
+		StockerState.SHELF: enter_shelf
+	}
+
+# Characters of the same type in the same store and state, updated together
+# What their state handler reads from the store's shelves is looked up
+# once for the whole group, so the cost of an update grows with the number
+# of groups rather than with the number of characters
+# The shelves do not change while a group is updated: shoppers take
+# supplies and stockers place them in other states
+class StateGroup:
+	# Parameters: entities and the first character of the group
+	def __init__(self, entities, character):
+		self.entities = entities
+		self.store = character.store
+		self.state = character.state
+
+		# Characters in the group, in update order
+		self.characters = [character]
+
+		# Looked up shelf data
+
+		# Number of supplies of each type on the shelves of the store
+		# <SupplyType, int>
+		self.shelf_counts = {}
+
+		# Y coordinate of the topmost supply on the shelf of each aisle,
+		# None if the shelf is empty
+		# <Aisle, float>
+		self.top_supply_ys = {}
+
+		# Supplies of each type on the shelf of each aisle, sorted by y
+		# <(Aisle, SupplyType), [Supply]>
+		self.supplies = {}
+
+	# Runs the state handler of each character in the group
+	def update(self):
+		state_handler = self.characters[0].state_handlers[self.state]
+		for character in self.characters:
+			state_handler(character, self)
+
+	# Same as StockLedger.get_shelf_count() of the store
+	def get_shelf_count(self, supply_type):
+		if supply_type not in self.shelf_counts:
+			self.shelf_counts[supply_type] =\
+				self.store.ledger.get_shelf_count(supply_type)
+		return self.shelf_counts[supply_type]
+
+	# Returns the y coordinate of the topmost supply on the aisle's shelf,
+	# None if the shelf is empty
+	def get_top_supply_y(self, aisle):
+		if aisle not in self.top_supply_ys:
+			self.top_supply_ys[aisle] = None
+			for supply in aisle.slots:
+				if supply != None:
+					self.top_supply_ys[aisle] = supply.y
+					break
+		return self.top_supply_ys[aisle]
+
+	# Same as Store.get_supplies() with a supply type
+	def get_supplies(self, aisle, supply_type):
+		key = (aisle, supply_type)
+		if key not in self.supplies:
+			self.supplies[key] = self.store.get_supplies(aisle, supply_type)
+		return self.supplies[key]
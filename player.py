@@ -1,7 +1,7 @@
-import sdl2
+import sdl2, random
 
 from entity import Entity, MovableEntity
-from items import Item, Vehicle, Supply, Inventory
+from items import Item, Vehicle, Supply, Inventory, Surface
 from enums import InventoryType, ItemType, SupplyType
 
 class Player(MovableEntity):
@@ -190,6 +190,19 @@ class Player(MovableEntity):
 				int(self.y - camera_y - self.height), int(self.width),
 				int(Player.render_height)), 0, None, sdl2.SDL_FLIP_NONE)
 
+	# Touches the item, which the player contaminates if infected
+	# and which can infect the player if it is contaminated
+	def touch(self, item, messages):
+		contamination = item.touch(self)
+		if self.infected:
+			return
+
+		if random.random() * 100\
+		< contamination * Surface.infection_chance / 100:
+			self.infected = True
+			messages.append('You have become infected from touching '
+				+ item.name.lower())
+
 	# Adds item to the player's nearby items list
 	def add_nearby_item(self, item):
 		self.nearby_items.append(item)
@@ -230,6 +243,16 @@ class Player(MovableEntity):
 		if (self.y < map_rectangle[1] and self.y_velocity < 0):
 			self.block_movement()
 
+	# Returns the rectangle check_collision() tests other entities against:
+	# the vehicle's if player is driving, otherwise the player's as rendered
+	# (x, y, width, height)
+	def get_collision_rect(self):
+		if self.vehicle != None:
+			return (self.vehicle.x, self.vehicle.y,
+				self.vehicle.width, self.vehicle.height)
+
+		return (self.x, self.y - self.height, self.width, Player.render_height)
+
 	# Also checks collision on the vehicle if player is driving
 	def check_collision(self, other):
 		if self.vehicle != None:
@@ -242,10 +265,7 @@ class Player(MovableEntity):
 			return self.vehicle.check_collision(other)
 		else:
 			collision = other.check_collision_directly(
-			self.x,
-			self.y - self.height,
-			self.width,
-			Player.render_height)
+				*self.get_collision_rect())
 
 			# If player touched an item, add to items touched
 			if collision and isinstance(other, Item):
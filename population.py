@@ -0,0 +1,98 @@
+import math, random
+
+# Returns the susceptible, exposed, infected and recovered numbers of people
+# of one neighborhood after the time passed: days
+def integrate(susceptible, exposed, infected, recovered, residents, days):
+	newly_exposed = Population.transmission_rate * susceptible * infected\
+		/ residents * days
+	newly_infected = Population.incubation_rate * exposed * days
+	newly_recovered = Population.recovery_rate * infected * days
+
+	return (susceptible - newly_exposed,
+		exposed + newly_exposed - newly_infected,
+		infected + newly_infected - newly_recovered,
+		recovered + newly_recovered)
+
+# Residents of the town's neighborhoods, who are not simulated as characters
+# but as the numbers of susceptible, exposed (infected but not contagious
+# yet), infected and recovered people in each neighborhood
+# Shoppers come from the neighborhoods and bring their infection
+# to the stores, and infections in the stores are counted back
+class Population:
+	# Default values:
+
+	# Number of people living in each house
+	residents_per_house = 3
+
+	# Chance that a resident is infected when the world is created
+	initial_infection_chance = 2 # %
+
+	# Rates of the model: 1 / day
+	# Contacts per day that would spread the infection
+	transmission_rate = 0.4
+	# 1 / days until exposed residents are contagious
+	incubation_rate = 0.2
+	# 1 / days until infected residents recover
+	recovery_rate = 0.1
+
+	# Longest time integrated in one step: days
+	max_step = 1 / 24.0
+
+	# Parameter: number of residents of each neighborhood
+	def __init__(self, neighborhood_sizes):
+		self.residents = [float(size) for size in neighborhood_sizes]
+		self.infected = [size * Population.initial_infection_chance / 100.0
+			for size in self.residents]
+		self.susceptible = [size - infected for size, infected
+			in zip(self.residents, self.infected)]
+		self.exposed = [0.0] * len(self.residents)
+		self.recovered = [0.0] * len(self.residents)
+
+	# Advances every neighborhood by the time: days
+	def step(self, days):
+		if len(self.residents) == 0 or days <= 0:
+			return
+
+		num_steps = int(math.ceil(days / Population.max_step))
+		for step in range(num_steps):
+			for neighborhood in range(len(self.residents)):
+				self.susceptible[neighborhood], self.exposed[neighborhood],\
+				self.infected[neighborhood], self.recovered[neighborhood]\
+					= integrate(self.susceptible[neighborhood],
+					self.exposed[neighborhood], self.infected[neighborhood],
+					self.recovered[neighborhood], self.residents[neighborhood],
+					days / num_steps)
+
+	# Returns the chance that a resident of the neighborhood is infected: %
+	def get_infection_chance(self, neighborhood):
+		return self.infected[neighborhood]\
+			/ self.residents[neighborhood] * 100
+
+	# Returns a random neighborhood, the more residents the more likely
+	def pick_neighborhood(self):
+		return random.choices(range(len(self.residents)),
+			weights = self.residents)[0]
+
+	# Makes the civilian a resident of a random neighborhood,
+	# infected with the chance of that neighborhood
+	# Does nothing if there are no neighborhoods
+	def populate(self, civilian):
+		if len(self.residents) == 0:
+			return
+
+		civilian.home = self.pick_neighborhood()
+		civilian.infected = random.random() * 100\
+			< self.get_infection_chance(civilian.home)
+
+	# Counts a resident of the neighborhood as exposed,
+	# e.g. one that got infected in a store
+	def add_exposure(self, neighborhood):
+		if self.susceptible[neighborhood] < 1:
+			return
+
+		self.susceptible[neighborhood] -= 1
+		self.exposed[neighborhood] += 1
+
+	# Returns the total number of infected residents
+	def get_num_infected(self):
+		return sum(self.infected)
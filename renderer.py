@@ -32,7 +32,11 @@ class Renderer:
 
 		self.camera = Camera()
 
-	def render(self, entities, textures, user_interface, screen_dimensions):
+	# Alpha is the fraction of a simulation step that passed since the last
+	# update, moving entities are drawn that far between their previous and
+	# current positions
+	def render(self, entities, textures, user_interface, screen_dimensions,
+		alpha = 1.0):
 		# Update screen dimensions if necessary
 		if self.screen_width != screen_dimensions[0]:
 			self.screen_width = screen_dimensions[0]
@@ -46,12 +50,16 @@ class Renderer:
 		sdl2.SDL_SetRenderDrawColor(self.sdl_renderer, 53, 69, 52, 255)
 		sdl2.SDL_RenderClear(self.sdl_renderer)
 		
+		# Offset from the player's position to their interpolated position
+		player_offset_x, player_offset_y =\
+			entities.player.interpolation_offset(alpha)
+
 		# Update camera position
 		self.camera.scroll(
 			self.screen_width,
 			self.screen_height,
-			entities.player.x,
-			entities.player.y,
+			entities.player.x + player_offset_x,
+			entities.player.y + player_offset_y,
 			entities.player.width,
 			entities.player.height)
 
@@ -59,56 +67,75 @@ class Renderer:
 
 		# Render entities:
 
-		for location in entities.locations:
-			if self.camera.within_view(location,\
-			self.screen_width, self.screen_height):
-				location.render(
-					self.sdl_renderer,
-					self.camera.x,
-					self.camera.y)
+		# Static geometry within the view of the camera
+		visible_locations = entities.location_tree.query(self.camera.x,
+			self.camera.y, self.screen_width, self.screen_height)
+		visible_map_elements = entities.map_element_tree.query(
+			self.camera.x, self.camera.y, self.screen_width, self.screen_height)
 
-		for map_element in entities.map_elements:
-			if self.camera.within_view(map_element,\
-			self.screen_width, self.screen_height):
-				map_element.render(
-					self.sdl_renderer,
-					self.camera.x,
-					self.camera.y)
+		for location in visible_locations:
+			location.render(
+				self.sdl_renderer,
+				self.camera.x,
+				self.camera.y)
+
+		for map_element in visible_map_elements:
+			map_element.render(
+				self.sdl_renderer,
+				self.camera.x,
+				self.camera.y)
+
+		# Items that move along with a character, drawn with the offset
+		# of that character, e.g. the vehicle being driven
+		# <Item, (float, float)>
+		carried_offsets = {}
+		if entities.player.vehicle != None:
+			carried_offsets[entities.player.vehicle] =\
+				(player_offset_x, player_offset_y)
+		if entities.player.item_being_carried != None:
+			carried_offsets[entities.player.item_being_carried] =\
+				(player_offset_x, player_offset_y)
 
 		for character in entities.characters:
+			offset_x, offset_y = character.interpolation_offset(alpha)
+			if character.item_being_carried != None:
+				carried_offsets[character.item_being_carried] =\
+					(offset_x, offset_y)
+
 			if self.camera.within_view(character,\
 			self.screen_width, self.screen_height):
 				character.render(
 					self.sdl_renderer,
-					self.camera.x,
-					self.camera.y)
+					self.camera.x - offset_x,
+					self.camera.y - offset_y)
 
 		for item in entities.items:
 			if self.camera.within_view(item,\
 			self.screen_width, self.screen_height):
+				offset_x, offset_y = carried_offsets.get(item, (0.0, 0.0))
 				item.render(
 					self.sdl_renderer,
-					self.camera.x,
-					self.camera.y)
+					self.camera.x - offset_x,
+					self.camera.y - offset_y)
 
 		# Render facades
-		for location in entities.locations:
-			if self.camera.within_view(location,\
-			self.screen_width, self.screen_height):
-				location.facade.render(
-					self.sdl_renderer,
-					self.camera.x,
-					self.camera.y)
+		for location in visible_locations:
+			location.facade.render(
+				self.sdl_renderer,
+				self.camera.x,
+				self.camera.y)
 
 		# Render player:
-		entities.player.render(self.sdl_renderer, self.camera.x, self.camera.y)
+		entities.player.render(self.sdl_renderer,
+			self.camera.x - player_offset_x,
+			self.camera.y - player_offset_y)
 
 		# Render item player is carrying if applicable
 		if entities.player.item_being_carried != None:
 			entities.player.item_being_carried.render(
 				self.sdl_renderer,
-				self.camera.x,
-				self.camera.y)
+				self.camera.x - player_offset_x,
+				self.camera.y - player_offset_y)
 
 		# Render user interface:
 		user_interface.render(self.sdl_renderer,
@@ -0,0 +1,49 @@
+import heapq
+
+# Calls functions at given simulation times, so that systems waiting for
+# a deadline do not have to check it every update
+# Work only happens when an event is due, however many events are waiting
+class Scheduler:
+	def __init__(self):
+		# Heap of events ordered by time, then by the order they were scheduled
+		# [(float, int, ScheduledEvent)]
+		self.events = []
+
+		# Number of events scheduled so far,
+		# keeps events scheduled for the same time in order
+		self.num_scheduled = 0
+
+	# Calls the function with no parameters once the simulation time
+	# has passed the parameter time: ms
+	# Returns the event so that it can be cancelled
+	def schedule(self, time, function):
+		event = ScheduledEvent(time, function)
+		heapq.heappush(self.events, (time, self.num_scheduled, event))
+		self.num_scheduled += 1
+		return event
+
+	# Calls the functions of the events whose time has passed
+	# Parameter is the current simulation time: ms
+	def run(self, ticks):
+		events = self.events
+		while len(events) > 0 and events[0][0] < ticks:
+			event = heapq.heappop(events)[2]
+			if not event.cancelled:
+				event.function()
+
+	# Returns the number of events waiting, including cancelled ones
+	def __len__(self):
+		return len(self.events)
+
+class ScheduledEvent:
+	def __init__(self, time, function):
+		# Simulation time the event is due after: ms
+		self.time = time
+
+		self.function = function
+
+		# Cancelled events stay in the scheduler, but are not called
+		self.cancelled = False
+
+	def cancel(self):
+		self.cancelled = True
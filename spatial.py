@@ -0,0 +1,233 @@
+import math
+
+from collision import RectArray
+
+# Uniform grid that buckets entities by the cells their rectangle overlaps
+# so that collision and proximity checks only look at nearby entities
+class SpatialHash:
+	# Default values:
+
+	# Length of a square cell, about the size of the largest items
+	default_cell_size = 250 # px
+
+	def __init__(self, cell_size = default_cell_size):
+		self.cell_size = cell_size
+
+		# Maps cell coordinates to the entities overlapping that cell
+		# Dictionaries are used as ordered sets so queries are deterministic
+		# <(int, int), <Entity, None>>
+		self.cells = {}
+
+		# Maps entity to the range of cells it currently occupies
+		# <Entity, (int, int, int, int)>
+		self.entity_cells = {}
+
+	# Returns the first and last cell columns and rows
+	# that the rectangle overlaps
+	def get_cell_range(self, x, y, width, height):
+		return (int(x // self.cell_size),
+			int(y // self.cell_size),
+			int((x + width) // self.cell_size),
+			int((y + height) // self.cell_size))
+
+	# Adds the entity to every cell its rectangle overlaps
+	def insert(self, entity):
+		cell_range = self.get_cell_range(entity.x, entity.y,
+			entity.width, entity.height)
+		self.entity_cells[entity] = cell_range
+		self.add_to_cells(entity, cell_range)
+
+	# Removes the entity from the grid if it is in it
+	def remove(self, entity):
+		cell_range = self.entity_cells.pop(entity, None)
+		if cell_range != None:
+			self.remove_from_cells(entity, cell_range)
+
+	# Moves the entity to the cells of its current rectangle
+	# Does nothing if the entity is still in the same cells,
+	# so it is cheap to call for entities that may not have moved
+	def move(self, entity):
+		cell_range = self.get_cell_range(entity.x, entity.y,
+			entity.width, entity.height)
+		old_cell_range = self.entity_cells.get(entity)
+
+		if cell_range == old_cell_range:
+			return
+
+		if old_cell_range != None:
+			self.remove_from_cells(entity, old_cell_range)
+
+		self.entity_cells[entity] = cell_range
+		self.add_to_cells(entity, cell_range)
+
+	# Returns list of entities whose rectangle overlaps the parameter
+	# rectangle, each entity only once
+	def query(self, x, y, width, height):
+		min_column, min_row, max_column, max_row = self.get_cell_range(
+			x, y, width, height)
+
+		# Single cell, no duplicates possible
+		if min_column == max_column and min_row == max_row:
+			cell = self.cells.get((min_column, min_row))
+			if cell == None:
+				return []
+
+			return [entity for entity in cell
+				if entity.check_collision_directly(x, y, width, height)]
+
+		found = {}
+		for column in range(min_column, max_column + 1):
+			for row in range(min_row, max_row + 1):
+				cell = self.cells.get((column, row))
+				if cell == None:
+					continue
+
+				for entity in cell:
+					if entity not in found\
+					and entity.check_collision_directly(x, y, width, height):
+						found[entity] = None
+
+		return list(found)
+
+	# Returns true if the entity is in the grid
+	def __contains__(self, entity):
+		return entity in self.entity_cells
+
+	# Returns the number of entities in the grid
+	def __len__(self):
+		return len(self.entity_cells)
+
+	def add_to_cells(self, entity, cell_range):
+		min_column, min_row, max_column, max_row = cell_range
+
+		for column in range(min_column, max_column + 1):
+			for row in range(min_row, max_row + 1):
+				cell = self.cells.get((column, row))
+				if cell == None:
+					cell = {}
+					self.cells[(column, row)] = cell
+				cell[entity] = None
+
+	def remove_from_cells(self, entity, cell_range):
+		min_column, min_row, max_column, max_row = cell_range
+
+		for column in range(min_column, max_column + 1):
+			for row in range(min_row, max_row + 1):
+				cell = self.cells[(column, row)]
+				del cell[entity]
+
+				# Do not keep empty cells around
+				if len(cell) == 0:
+					del self.cells[(column, row)]
+
+# Immutable bounding volume hierarchy over entities that never move
+# (locations and map elements), bulk loaded once after world creation
+class StaticTree:
+	# Default values:
+
+	# Maximum number of entities in a leaf node
+	default_leaf_size = 8
+
+	def __init__(self, entities, leaf_size = default_leaf_size):
+		# Entities in the order they were given, queries return
+		# entities in this order so rendering order is kept
+		self.entities = list(entities)
+		self.leaf_size = leaf_size
+
+		# Entity indices reordered so that each node covers
+		# a contiguous range of them
+		self.order = list(range(len(self.entities)))
+
+		# Nodes are stored in parallel lists, the root is node 0
+		# Bounding rectangle of each node: px
+		self.min_x = []
+		self.min_y = []
+		self.max_x = []
+		self.max_y = []
+
+		# Child node indices, -1 for leaf nodes
+		self.left = []
+		self.right = []
+
+		# Range of self.order covered by each node
+		self.start = []
+		self.end = []
+
+		if len(self.entities) > 0:
+			self.build(0, len(self.entities))
+
+		# Rectangles of the entities in the order of self.order,
+		# so that each leaf node is tested in one batch
+		self.rects = RectArray([self.entities[index] for index in self.order])
+
+	# Creates the node covering self.order[start:end] and its children
+	# by splitting the entities in half along the longer axis
+	# Returns the index of the created node
+	def build(self, start, end):
+		node = len(self.min_x)
+
+		min_x = min_y = math.inf
+		max_x = max_y = -math.inf
+		for index in self.order[start:end]:
+			entity = self.entities[index]
+			min_x = min(min_x, entity.x)
+			min_y = min(min_y, entity.y)
+			max_x = max(max_x, entity.x + entity.width)
+			max_y = max(max_y, entity.y + entity.height)
+
+		self.min_x.append(min_x)
+		self.min_y.append(min_y)
+		self.max_x.append(max_x)
+		self.max_y.append(max_y)
+		self.left.append(-1)
+		self.right.append(-1)
+		self.start.append(start)
+		self.end.append(end)
+
+		if end - start <= self.leaf_size:
+			return node
+
+		# Sort by center along the longer axis of the node
+		if max_x - min_x >= max_y - min_y:
+			key = lambda index: self.entities[index].x\
+				+ self.entities[index].width / 2
+		else:
+			key = lambda index: self.entities[index].y\
+				+ self.entities[index].height / 2
+		self.order[start:end] = sorted(self.order[start:end], key = key)
+
+		middle = (start + end) // 2
+		self.left[node] = self.build(start, middle)
+		self.right[node] = self.build(middle, end)
+		return node
+
+	# Returns list of entities whose rectangle overlaps the parameter
+	# rectangle, in the order they were given to the tree
+	def query(self, x, y, width, height):
+		if len(self.entities) == 0:
+			return []
+
+		found = []
+		stack = [0]
+		while len(stack) > 0:
+			node = stack.pop()
+
+			# Same comparisons as Entity.check_collision_directly()
+			if self.max_y[node] <= y or self.min_y[node] >= y + height\
+			or self.max_x[node] <= x or self.min_x[node] >= x + width:
+				continue
+
+			if self.left[node] == -1:
+				for index in self.rects.query_indices(x, y, width, height,
+					self.start[node], self.end[node]):
+					found.append(self.order[index])
+			else:
+				stack.append(self.left[node])
+				stack.append(self.right[node])
+
+		found.sort()
+		return [self.entities[index] for index in found]
+
+	# Returns the number of entities in the tree
+	def __len__(self):
+		return len(self.entities)
@@ -1,10 +1,12 @@
 #from mixer.backend.sqlalchemy import Mixer
 
-import unittest
+import unittest, random
+from unittest import mock
 
 #mixer = Mixer(session=session, commit=True)
 
-from entity import Entity, MovableEntity
+from entity import Entity, MovableEntity, Handle
+from entities import Entities, Controller
 from player import Player
 from items import (
 	Item,
@@ -13,12 +15,34 @@ from items import (
 	Kitchen,
 	ShoppingCart,
 	Supply,
+	SupplyKind,
 	Door,
 	SelfCheckout,
 	Closet,
-	FuelDispenser
+	FuelDispenser,
+	Surface
+)
+from locations import GroceryStore, Aisle
+from enums import (
+	SupplyType,
+	LocationType,
+	AisleType,
+	ShopperState,
+	StockerState
+)
+from clock import UnthrottledClock
+from scheduler import Scheduler
+from npcs import Shopper, Stocker, StateGroup
+from headless import HeadlessGame, NullTextures
+from spatial import SpatialHash, StaticTree
+from collision import RectArray
+from transmission import Transmission
+from population import Population, integrate
+from benchmark import (
+	get_world_entities,
+	get_slot_names,
+	measure_classes
 )
-from enums import SupplyType
 
 class ItemTests(unittest.TestCase):
 	# Initializes player at position (0, 0) and
@@ -208,7 +232,7 @@ class ComputerTests(unittest.TestCase):
 class ShoppingCartTests(unittest.TestCase):
 	# Initializes player, item, and shopping cart at positions (0, 0)
 	player = Player()
-	supply = Supply(0, 0, 0, 0, None, 0, '')
+	supply = Supply(0, 0, SupplyKind(0, '', None, 0))
 	shopping_cart = ShoppingCart(0, 0, None)
 
 	def test_handle_collision(self):
@@ -274,7 +298,7 @@ class ShoppingCartTests(unittest.TestCase):
 		self.assertEqual(self.shopping_cart.items.supplies[0], 2)
 
 		# Test total cost after one priced item
-		self.supply.price = 5
+		self.supply.kind = SupplyKind(0, '', None, 5)
 		self.player.item_being_carried = self.supply
 		self.shopping_cart.last_interaction = -1000
 		self.shopping_cart.handle_interaction(self.player, messages)
@@ -308,7 +332,7 @@ class ShoppingCartTests(unittest.TestCase):
 class SupplyTests(unittest.TestCase):
 	# Initializes player and item at positions (0, 0)
 	player = Player()
-	supply = Supply(0, 0, 0, 0, None, 0, '')
+	supply = Supply(0, 0, SupplyKind(0, '', None, 0))
 
 	def test_carry(self):
 		# Test adjustment to player moving up
@@ -370,6 +394,9 @@ class DoorTests(unittest.TestCase):
 				original_y - self.player.height * 2.5)
 		self.assertFalse(self.player.check_collision(self.door))
 
+		# Teleported player is not drawn between the two sides
+		self.assertEqual(self.player.interpolation_offset(0.0), (0.0, 0.0))
+
 		# Test player being above the door
 		self.player.y = self.door.y - self.player.height
 		original_y = self.player.y
@@ -383,6 +410,52 @@ class DoorTests(unittest.TestCase):
 
 		self.assertEqual(len(messages), 0)
 
+	# Tests that infected characters contaminate the door
+	# and the contamination halves every half-life without being updated
+	def test_contamination(self):
+		original_clock = Entity.clock
+		clock = UnthrottledClock(Surface.contamination_half_life)
+		Entity.set_clock(clock)
+
+		door = Door(0, 0, None)
+		shopper = Shopper(0, 0, 'Shopper', None)
+
+		shopper.infected = False
+		self.assertEqual(door.touch(shopper), 0)
+		self.assertEqual(door.get_contamination(), 0)
+
+		shopper.infected = True
+		door.touch(shopper)
+		self.assertEqual(door.get_contamination(), Surface.max_contamination)
+
+		clock.tick()
+		self.assertEqual(door.get_contamination(),
+			Surface.max_contamination / 2)
+
+		# Skipped time counts too
+		clock.skip(Surface.contamination_half_life)
+		self.assertEqual(door.get_contamination(),
+			Surface.max_contamination / 4)
+
+		Entities().remove_character(shopper)
+		Entity.set_clock(original_clock)
+
+	# Tests that the player can be infected by touching a contaminated door
+	def test_infection(self):
+		door = Door(0, 0, None)
+		door.contamination = Surface.max_contamination
+		door.last_touched = Entity.clock.get_elapsed_ticks()
+		door.last_interaction = -1000
+		player = Player()
+		messages = []
+
+		with mock.patch.object(Surface, 'infection_chance', 100):
+			door.handle_interaction(player, messages)
+
+		self.assertTrue(player.infected)
+		self.assertEqual(messages, ['You have become infected from touching '
+			+ 'entrance'])
+
 class SelfCheckoutTests(unittest.TestCase):
 	# Initializes player and self-checkout at positions (0, 0)
 	player = Player()
@@ -391,8 +464,7 @@ class SelfCheckoutTests(unittest.TestCase):
 	def test_handle_interaction(self):
 		# Test checking out one item
 		messages = []
-		supply = Supply(0, 0, 0, 0, None, 0, '')
-		supply.price = 5
+		supply = Supply(0, 0, SupplyKind(0, '', None, 5))
 		self.player.item_being_carried = supply
 		self.player.shopping_cart = None
 		self.player.money = 1000
@@ -652,6 +724,29 @@ class MovableEntityTests(unittest.TestCase):
 		self.assertIs(int(self.movable_entity.x), 50)
 		self.assertIs(int(self.movable_entity.y), 50)
 
+	# Tests that the entity is drawn between its previous and current
+	# positions depending on how much of the next step has passed
+	def test_interpolation_offset(self):
+		self.reset_entity_position()
+		self.movable_entity.x_velocity = self.movable_entity.speed
+		self.movable_entity.y_velocity = 0
+
+		self.movable_entity.last_moved = -1000
+		self.movable_entity.update_position()
+
+		# No time passed since the update, so draw at the previous position
+		offset_x, offset_y = self.movable_entity.interpolation_offset(0.0)
+		self.assertEqual(int(self.movable_entity.x + offset_x), 0)
+		self.assertEqual(offset_y, 0)
+
+		# Half of the step passed
+		offset_x, offset_y = self.movable_entity.interpolation_offset(0.5)
+		self.assertEqual(int(self.movable_entity.x + offset_x), 25)
+
+		# Full step passed, so draw at the current position
+		offset_x, offset_y = self.movable_entity.interpolation_offset(1.0)
+		self.assertEqual(offset_x, 0)
+
 	# Tests that entity does not move if movement is blocked
 	def test_block_movement(self):
 		self.movable_entity.x_velocity = self.movable_entity.speed
@@ -684,20 +779,797 @@ class MovableEntityTests(unittest.TestCase):
 		self.movable_entity.x = 0
 		self.movable_entity.y = 0
 
+class ClockTests(unittest.TestCase):
+	# Tests that the unthrottled clock advances by exactly one step each tick
+	def test_unthrottled_tick(self):
+		clock = UnthrottledClock(10)
+
+		self.assertEqual(clock.get_ticks(), 0)
+		self.assertEqual(clock.tick(), 10)
+		self.assertEqual(clock.tick(), 20)
+		self.assertEqual(clock.get_ticks(), 20)
+
+	# Tests that entities only see the time sampled on the last tick
+	def test_entities_use_installed_clock(self):
+		original_clock = Entity.clock
+		clock = UnthrottledClock(1000)
+		Entity.set_clock(clock)
+
+		movable_entity = MovableEntity(0, 0, 50, 50, None, 50)
+		movable_entity.x_velocity = movable_entity.speed
+
+		# Time has not been sampled again, so the entity does not move
+		movable_entity.update_position()
+		self.assertEqual(movable_entity.x, 0)
+
+		# Entity moves for exactly one step
+		clock.tick()
+		movable_entity.update_position()
+		self.assertEqual(movable_entity.x, 50)
+
+		Entity.set_clock(original_clock)
+
+class SchedulerTests(unittest.TestCase):
+	def setUp(self):
+		self.scheduler = Scheduler()
+		self.calls = []
+
+	# Tests that events are only called once their time has passed,
+	# in time order and then in the order they were scheduled
+	def test_run(self):
+		self.scheduler.schedule(200, lambda: self.calls.append('c'))
+		self.scheduler.schedule(100, lambda: self.calls.append('a'))
+		self.scheduler.schedule(100, lambda: self.calls.append('b'))
+
+		self.scheduler.run(100)
+		self.assertEqual(self.calls, [])
+
+		self.scheduler.run(150)
+		self.assertEqual(self.calls, ['a', 'b'])
+		self.assertEqual(len(self.scheduler), 1)
+
+		self.scheduler.run(250)
+		self.assertEqual(self.calls, ['a', 'b', 'c'])
+		self.assertEqual(len(self.scheduler), 0)
+
+	# Tests that cancelled events are not called
+	def test_cancel(self):
+		event = self.scheduler.schedule(100, lambda: self.calls.append('a'))
+		event.cancel()
+
+		self.scheduler.run(150)
+		self.assertEqual(self.calls, [])
+		self.assertEqual(len(self.scheduler), 0)
+
+	# Tests that events scheduled by a called event are called in the same
+	# run only if their time has passed
+	def test_reschedule(self):
+		def repeat():
+			self.calls.append(len(self.calls))
+			self.scheduler.schedule(100 * (len(self.calls) + 1), repeat)
+		self.scheduler.schedule(100, repeat)
+
+		self.scheduler.run(350)
+		self.assertEqual(self.calls, [0, 1, 2])
+		self.assertEqual(len(self.scheduler), 1)
+
+class SpatialHashTests(unittest.TestCase):
+	def setUp(self):
+		self.grid = SpatialHash(100)
+		self.entity = Entity(50, 50, 100, 100)
+		self.grid.insert(self.entity)
+
+	# Tests that entity is found in every cell it overlaps
+	def test_query(self):
+		self.assertEqual(self.grid.query(60, 60, 10, 10), [self.entity])
+		self.assertEqual(self.grid.query(140, 140, 5, 5), [self.entity])
+		self.assertEqual(self.grid.query(0, 0, 300, 300), [self.entity])
+		self.assertEqual(self.grid.query(0, 0, 40, 40), [])
+
+	# Tests that moved entity is only found at its new location
+	def test_move(self):
+		self.entity.x = 1000
+		self.entity.y = 1000
+		self.grid.move(self.entity)
+
+		self.assertEqual(self.grid.query(60, 60, 10, 10), [])
+		self.assertEqual(self.grid.query(1010, 1010, 10, 10), [self.entity])
+
+	# Tests that removed entity is not found and leaves no empty cells
+	def test_remove(self):
+		self.grid.remove(self.entity)
+
+		self.assertNotIn(self.entity, self.grid)
+		self.assertEqual(self.grid.query(0, 0, 300, 300), [])
+		self.assertEqual(len(self.grid.cells), 0)
+
+class StaticTreeTests(unittest.TestCase):
+	def setUp(self):
+		# Row of entities with gaps between them
+		self.entities = [Entity(x * 100, 0, 50, 50) for x in range(50)]
+		self.tree = StaticTree(self.entities, 4)
+
+	# Tests that overlapping entities are found in their original order
+	def test_query(self):
+		self.assertEqual(self.tree.query(0, 0, 500, 10),
+			self.entities[0:5])
+		self.assertEqual(self.tree.query(4910, 10, 10, 10),
+			[self.entities[49]])
+
+	# Tests that nothing is found between entities or outside the tree
+	def test_query_empty(self):
+		self.assertEqual(self.tree.query(60, 0, 30, 50), [])
+		self.assertEqual(self.tree.query(0, 50, 5000, 50), [])
+		self.assertEqual(StaticTree([]).query(0, 0, 100, 100), [])
+
+class RectArrayTests(unittest.TestCase):
+	def setUp(self):
+		self.entities = [Entity(x * 100, 0, 50, 50) for x in range(5)]
+		self.rects = RectArray(self.entities)
+
+	# Tests that overlapping rectangles are found in order,
+	# with the same edge cases as Entity.check_collision_directly()
+	def test_query(self):
+		self.assertEqual(self.rects.query_indices(40, 40, 100, 100), [0, 1])
+		self.assertEqual(self.rects.query_indices(50, 0, 50, 50), [])
+		self.assertEqual(self.rects.query(0, 0, 500, 10), self.entities)
+
+		for x in range(-50, 550, 25):
+			self.assertEqual(self.rects.query(x, 25, 30, 30),
+				[entity for entity in self.entities
+				if entity.check_collision_directly(x, 25, 30, 30)])
+
+	# Tests that only the range of rectangles is tested
+	def test_query_range(self):
+		self.assertEqual(self.rects.query_indices(0, 0, 500, 10, 1, 3),
+			[1, 2])
+
+	# Tests that moved entities are found at their new position
+	# once the cache is refreshed
+	def test_refresh(self):
+		self.entities[0].x = 1000
+		self.assertEqual(self.rects.query_indices(1000, 0, 10, 10), [])
+
+		self.rects.refresh()
+		self.assertEqual(self.rects.query_indices(1000, 0, 10, 10), [0])
+
+class TransmissionTests(unittest.TestCase):
+	def setUp(self):
+		self.transmission = Transmission(100)
+
+		# Infected shopper with one shopper next to it
+		# and one out of the contact radius
+		self.shoppers = [Shopper(x, 0, 'Shopper', None)
+			for x in (0, 60, 300)]
+		for shopper in self.shoppers:
+			shopper.width = 50
+			shopper.height = 50
+			shopper.infected = False
+			shopper.wearing_mask = False
+		self.shoppers[0].infected = True
+
+	def tearDown(self):
+		entities = Entities()
+		for shopper in self.shoppers:
+			entities.remove_character(shopper)
+
+	# Tests that only the civilian in contact is infected
+	def test_spread(self):
+		self.assertEqual(self.transmission.spread(self.shoppers, 10 ** 7),
+			[self.shoppers[1]])
+		self.assertTrue(self.shoppers[1].infected)
+		self.assertFalse(self.shoppers[2].infected)
+		self.assertEqual(self.transmission.num_transmissions, 1)
+
+		# No contact time, no infection
+		self.shoppers[2].x = 0
+		self.assertEqual(self.transmission.spread(self.shoppers, 0), [])
+
+	# Tests that the chance grows with the contact time
+	# and masks lower it
+	def test_get_chance(self):
+		chance = self.transmission.get_chance(False, False, 1000)
+		self.assertTrue(0 < chance
+			< self.transmission.get_chance(False, False, 2000) < 100)
+		self.assertTrue(self.transmission.get_chance(True, False, 1000)
+			< self.transmission.get_chance(False, True, 1000) < chance)
+
+class PopulationTests(unittest.TestCase):
+	def setUp(self):
+		self.population = Population([100, 300])
+
+	# Tests that every neighborhood is integrated like a single one
+	# and nobody is lost
+	def test_step(self):
+		numbers = [(self.population.susceptible[neighborhood],
+			self.population.exposed[neighborhood],
+			self.population.infected[neighborhood],
+			self.population.recovered[neighborhood]) for neighborhood in (0, 1)]
+
+		self.population.step(0.5)
+
+		for neighborhood, residents in enumerate((100, 300)):
+			expected = numbers[neighborhood]
+			for step in range(12):
+				expected = integrate(*expected, residents, 0.5 / 12)
+
+			self.assertAlmostEqual(self.population.infected[neighborhood],
+				expected[2])
+			self.assertAlmostEqual(self.population.susceptible[neighborhood]
+				+ self.population.exposed[neighborhood]
+				+ self.population.infected[neighborhood]
+				+ self.population.recovered[neighborhood], residents)
+
+		self.assertTrue(self.population.recovered[0] > 0)
+
+	# Tests that civilians are infected with the chance of their neighborhood
+	def test_populate(self):
+		self.population.infected[1] = 300
+		self.population.susceptible[1] = 0
+		self.population.residents[0] = 0
+
+		shopper = Shopper(0, 0, 'Shopper', None)
+		self.population.populate(shopper)
+
+		self.assertEqual(shopper.home, 1)
+		self.assertTrue(shopper.infected)
+		Entities().remove_character(shopper)
+
+	# Tests that infections in the stores are counted in the neighborhood
+	def test_add_exposure(self):
+		susceptible = self.population.susceptible[0]
+		self.population.add_exposure(0)
+
+		self.assertEqual(self.population.susceptible[0], susceptible - 1)
+		self.assertEqual(self.population.exposed[0], 1)
+
+class EntitiesTests(unittest.TestCase):
+	def setUp(self):
+		self.entities = Entities()
+		self.textures = NullTextures()
+		self.supplies = [self.entities.add_supply(SupplyType.FOOD, x * 100, 0,
+			self.textures) for x in range(3)]
+
+	# Tests that removed item stays until compaction
+	# and the other items keep their order
+	def test_remove_item(self):
+		self.entities.remove_item(self.supplies[0])
+		self.entities.remove_item(self.supplies[0])
+
+		self.assertTrue(self.supplies[0].removed)
+		self.assertEqual(len(self.entities.items), 3)
+
+		self.entities.compact()
+
+		self.assertEqual(self.entities.items, self.supplies[1:])
+		self.assertNotIn(self.supplies[0], self.entities.item_grid)
+		self.assertEqual(len(self.entities.removed_items), 0)
+
+	# Tests that handle no longer gives back a removed item
+	def test_handle(self):
+		handle = Handle(self.supplies[1])
+		self.assertIs(handle.get(), self.supplies[1])
+
+		self.entities.remove_item(self.supplies[1])
+		self.assertIsNone(handle.get())
+
+	# Tests that removed supply is reused by the next added supply
+	def test_supply_pool(self):
+		handle = Handle(self.supplies[0])
+		self.entities.remove_item(self.supplies[0])
+		self.entities.compact()
+
+		supply = self.entities.add_supply(SupplyType.SOAP, 500, 500,
+			self.textures)
+
+		self.assertIs(supply, self.supplies[0])
+		self.assertEqual(supply.supply, SupplyType.SOAP)
+		self.assertFalse(supply.removed)
+		self.assertIn(supply, self.entities.item_grid)
+		self.assertIsNone(handle.get())
+		self.assertEqual(self.entities.supply_factory.pool.get_metrics(),
+			{'created': 3, 'reused': 1, 'available': 0})
+
+	# Tests that supplies of the same type share one description
+	def test_supply_kind(self):
+		soap = self.entities.add_supply(SupplyType.SOAP, 0, 100, self.textures)
+
+		self.assertIs(self.supplies[0].kind, self.supplies[1].kind)
+		self.assertIsNot(soap.kind, self.supplies[0].kind)
+		self.assertEqual(soap.name, 'Soap')
+		self.assertEqual(soap.price, Supply.default_price)
+		self.assertEqual(soap.interaction_message,
+			Supply.default_interaction_message + ' - $'
+			+ str(Supply.default_price))
+
+class HeadlessGameTests(unittest.TestCase):
+	def setUp(self):
+		self.original_clock = Entity.clock
+
+	def tearDown(self):
+		Entity.set_clock(self.original_clock)
+
+	# Tests that a world is created and simulated without any textures
+	def test_run(self):
+		game = HeadlessGame(1000, 100, 70, 1, level_of_detail = False)
+
+		self.assertTrue(len(game.entities.locations) > 0)
+		self.assertTrue(len(game.entities.items) > 0)
+
+		# Gas station opens as soon as the player wakes up,
+		# so a shopper must arrive within 18 seconds
+		game.run(int(18000 / game.clock.step) + 1)
+
+		shoppers = [character for character in game.entities.characters
+			if isinstance(character, Shopper)]
+		self.assertTrue(len(shoppers) > 0)
+
+	# Tests that player meters decrease on their scheduled intervals
+	def test_meters(self):
+		game = HeadlessGame(1000, 50, 50, 1)
+		player = game.entities.player
+		player.infected = True
+
+		# The first update wakes the player up, which restores the meters
+		game.step()
+		morale = player.morale
+		health = player.health
+
+		game.run(int(Controller.morale_decrease_interval
+			/ game.clock.step))
+
+		self.assertEqual(player.morale, morale - 1)
+		self.assertEqual(player.health, health
+			- int(Controller.morale_decrease_interval
+			/ Controller.health_decrease_interval))
+
+	# Tests that stores open and close on their scheduled transitions,
+	# including after the player skips the game time by sleeping
+	def test_store_transitions(self):
+		game = HeadlessGame(1000, 100, 70, 1)
+		controller = game.controller
+		store = [store for store in controller.stores
+			if store.type == LocationType.GROCERY_STORE][0]
+
+		# Closed at midnight
+		self.assertTrue(store.doors[0].locked)
+		self.assertNotIn(store, controller.shopper_generations)
+
+		# The first update wakes the player up before the store opens
+		game.step()
+		self.assertTrue(store.doors[0].locked)
+
+		# Opens after the opening time
+		minutes_left = GroceryStore.open_time\
+			- controller.get_game_minutes() % 1440
+		game.run(int(minutes_left / 1440 * Controller.game_day_length
+			/ game.clock.step) + 2)
+		self.assertFalse(store.doors[0].locked)
+		self.assertIn(store, controller.shopper_generations)
+
+		# Sleeping skips to the next morning, before the store opens
+		game.entities.player.sleeping = True
+		game.step()
+		self.assertTrue(store.doors[0].locked)
+		self.assertNotIn(store, controller.shopper_generations)
+
+	# Tests that a new world does not inherit the time skipped in another
+	def test_skipped_time(self):
+		game = HeadlessGame(1000, 100, 70, 1)
+		game.clock.skip(Surface.contamination_half_life)
+
+		game = HeadlessGame(1000, 100, 70, 1)
+		self.assertEqual(Entity.clock.get_elapsed_ticks(),
+			game.clock.get_ticks())
+
+	# Tests that skipping time while stores are closed sends the shoppers
+	# home and lets the stockers refill the shelves without selling anything
+	def test_fast_forward_stores(self):
+		game = HeadlessGame(1000, 100, 70, 1)
+		controller = game.controller
+		game.run(int(18000 / game.clock.step) + 1)
+
+		store = [store for store in controller.stores
+			if store.type == LocationType.GROCERY_STORE][0]
+
+		# Empty the shelves
+		controller.sell_supplies(game.entities, store,
+			sum(store.ledger.shelves.values()))
+		self.assertEqual(sum(store.ledger.shelves.values()), 0)
+		stock_size = store.get_stock_size()
+
+		# 23:00 to 7:00
+		controller.fast_forward_stores(game.entities, 23 * 60, 8 * 60)
+		game.entities.compact()
+
+		shoppers = [character for character in game.entities.characters
+			if isinstance(character, Shopper)]
+		self.assertEqual(shoppers, [])
+
+		num_placed = sum(store.ledger.shelves.values())
+		self.assertTrue(num_placed > 0)
+		self.assertEqual(store.get_stock_size(), stock_size - num_placed)
+		self.assertEqual(num_placed, sum(len(store.get_supplies(aisle))
+			for aisle in store.aisles))
+
+	# Tests that stores far from the player are simulated without
+	# characters, and get their characters back when the player comes near
+	def test_level_of_detail(self):
+		game = HeadlessGame(1000, 100, 70, 1)
+		controller = game.controller
+		entities = game.entities
+		player = entities.player
+
+		# Stockers come back as the same civilians
+		for stocker in entities.characters:
+			if isinstance(stocker, Stocker):
+				stocker.infect()
+				stocker.wearing_mask = not stocker.wearing_mask
+		records = sorted((stocker.home, stocker.infected,
+			stocker.infected_time, stocker.wearing_mask)
+			for stocker in entities.characters if isinstance(stocker, Stocker))
+
+		player.x = -Controller.detail_distance * 10
+		controller.update_level_of_detail(entities)
+		entities.compact()
+
+		self.assertEqual(set(controller.abstract_stores),
+			set(controller.stores))
+		self.assertFalse(any(isinstance(character, Shopper)
+			or isinstance(character, Stocker)
+			for character in entities.characters))
+		num_stockers = sum(len(abstract_store.stockers)
+			for abstract_store in controller.abstract_stores.values())
+		self.assertTrue(num_stockers > 0)
+
+		# Player walks up to every store
+		for store in controller.stores:
+			player.x = store.x
+			player.y = store.y
+			controller.update_level_of_detail(entities)
+			self.assertNotIn(store, controller.abstract_stores)
+
+		stockers = [character for character in entities.characters
+			if isinstance(character, Stocker)]
+		self.assertEqual(len(stockers), num_stockers)
+		self.assertTrue(all(stocker.home != -1 for stocker in stockers))
+		self.assertEqual(sorted((stocker.home, stocker.infected,
+			stocker.infected_time, stocker.wearing_mask)
+			for stocker in stockers), records)
+
+	# Tests that a vehicle runs into a location as soon as the vehicle,
+	# not only the player driving it, reaches the location
+	def test_vehicle_location_collision(self):
+		game = HeadlessGame(1000, 100, 70, 1)
+		controller = game.controller
+		player = game.entities.player
+		store = controller.stores[0]
+
+		vehicle = Vehicle(0, 0, None)
+		player.vehicle = vehicle
+		player.x = store.x - vehicle.width + 10
+		player.y = store.y + 10
+		vehicle.drive(player)
+		self.assertFalse(store.check_collision_directly(player.x, player.y,
+			player.width, player.height))
+
+		controller.update_entities(game.entities)
+		self.assertIn(store, controller.colliding_locations)
+		self.assertEqual(controller.location_text, store.name)
+
+	# Tests that the characters are counted in the state they were updated in
+	def test_state_counts(self):
+		game = HeadlessGame(1000, 100, 70, 1, level_of_detail = False)
+		game.step()
+
+		stockers = [character for character in game.entities.characters
+			if isinstance(character, Stocker)]
+		counts = game.controller.get_state_counts(Stocker)
+		self.assertEqual(len(counts), len(StockerState.state_strs))
+		self.assertEqual(counts[StockerState.STOCKROOM], len(stockers))
+		self.assertEqual(game.controller.get_state_counts(Shopper),
+			[0] * len(ShopperState.state_strs))
+
+	# Tests that the stockers created with the world live in a neighborhood
+	def test_stocker_residents(self):
+		game = HeadlessGame(1000, 100, 70, 1, level_of_detail = False)
+
+		stockers = [character for character in game.entities.characters
+			if isinstance(character, Stocker)]
+		self.assertTrue(len(stockers) > 0)
+		self.assertTrue(all(stocker.home != -1 for stocker in stockers))
+
+	# Tests that no entity of the world keeps an attribute dictionary
+	def test_slots(self):
+		game = HeadlessGame(1000, 100, 70, 1)
+
+		for entity in get_world_entities(game.entities):
+			self.assertFalse(hasattr(entity, '__dict__'),
+				type(entity).__name__)
+
+		# Baseline of the memory benchmark holds the attributes
+		# of the whole class hierarchy in a dictionary
+		self.assertIn('x', get_slot_names(Supply))
+		self.assertIn('kind', get_slot_names(Supply))
+
+		classes = measure_classes(get_world_entities(game.entities))
+		count, slotted, unslotted = classes['Supply']
+		self.assertTrue(slotted < unslotted)
+
 class LocationTests(unittest.TestCase):
-	pass
+	def setUp(self):
+		self.store = GroceryStore(0, 0, 1000, 1000, None, None)
+
+		# Aisles added out of order
+		self.right_aisle = Aisle(500, 100, 50, 500, None)
+		self.left_aisle = Aisle(100, 100, 50, 500, None)
+		self.store.add_aisle(self.right_aisle)
+		self.store.add_aisle(self.left_aisle)
+		self.right_aisle.create_slots(5, 100)
+		self.left_aisle.create_slots(5, 100)
+
+		self.food = Supply(0, 0, SupplyKind(SupplyType.FOOD, '', None))
+		self.soap = Supply(0, 0, SupplyKind(SupplyType.SOAP, '', None))
+		self.store.add_supply(self.soap, self.left_aisle, 1)
+		self.store.add_supply(self.food, self.left_aisle, 0)
+
+	# Tests that open time is counted within the time span over several days
+	def test_get_open_minutes(self):
+		# 8:00 to 10:00, opens at 9:00
+		self.assertEqual(self.store.get_open_minutes(8 * 60, 120), 60)
+		# 23:00 to 1:00, closed the whole time
+		self.assertEqual(self.store.get_open_minutes(23 * 60, 120), 0)
+		# 21:00 to 10:00 the next day
+		self.assertEqual(self.store.get_open_minutes(21 * 60, 13 * 60), 120)
+		# Whole days, starting after midnight
+		self.assertEqual(self.store.get_open_minutes(1440 + 60, 2880),
+			2 * 13 * 60)
+
+	# Tests that aisles are kept sorted by x and found by x range
+	def test_get_aisles(self):
+		self.assertEqual(self.store.aisles,
+			[self.left_aisle, self.right_aisle])
+		self.assertEqual(self.store.get_aisles(0, 200), [self.left_aisle])
+		self.assertEqual(self.store.get_aisles(100, 500), [])
+		self.assertIs(self.left_aisle.store, self.store)
+
+	# Tests that supplies are bucketed by aisle and supply type
+	def test_get_supplies(self):
+		self.assertEqual(self.store.get_supplies(self.left_aisle),
+			[self.food, self.soap])
+		self.assertEqual(self.store.get_supplies(self.left_aisle,
+			SupplyType.SOAP), [self.soap])
+		self.assertEqual(self.store.get_supplies(self.right_aisle), [])
+
+	# Tests that navigation waypoints are created from the aisles,
+	# doors and checkouts of the store
+	def test_create_navigation(self):
+		self.store.doors.append(Door(300, 950, None))
+		self.store.add_checkout(SelfCheckout(400, 800, None))
+		self.store.create_navigation()
+		navigation = self.store.navigation
+
+		self.assertEqual(navigation.aisle_top_y, 100)
+		self.assertEqual(navigation.aisle_bottom_y, 600)
+		self.assertEqual(navigation.last_aisle_x, 500)
+		self.assertEqual(navigation.checkout_y, 800)
+		self.assertEqual(navigation.exit_xs, [300 - Door.default_width])
+		self.assertEqual(navigation.get_aisle_turn_xs(0),
+			[100 + GroceryStore.aisle_spacing / 2,
+			500 + GroceryStore.aisle_spacing / 2])
+
+	# Tests that removed supply is no longer on the shelf
+	def test_remove_supply(self):
+		self.store.remove_supply(self.food)
+
+		self.assertIsNone(self.food.aisle)
+		self.assertEqual(self.store.get_supplies(self.left_aisle,
+			SupplyType.FOOD), [])
+		self.assertIsNone(self.left_aisle.slots[0])
+
+	# Tests that supplies are moved to their slot
+	# and the closest free slot is found
+	def test_slots(self):
+		self.assertEqual((self.soap.x, self.soap.y), (100, 200))
+
+		self.assertEqual(self.left_aisle.get_free_slot(180, 50), -1)
+		self.assertEqual(self.left_aisle.get_free_slot(180, 150), 2)
+		self.assertEqual(self.left_aisle.get_free_slot(390, 50), 3)
+		self.assertEqual(self.left_aisle.get_free_slot(1000, 50), -1)
+
+	# Tests that the ledger follows supplies from the shelves
+	# to the carts and out of the store
+	def test_ledger(self):
+		ledger = self.store.ledger
+		self.assertEqual(ledger.get_shelf_count(SupplyType.FOOD), 1)
+
+		self.store.remove_supply(self.food)
+		self.assertEqual(ledger.get_shelf_count(SupplyType.FOOD), 0)
+		self.assertEqual(ledger.get_cart_count(SupplyType.FOOD), 1)
+
+		Entities().remove_item(self.food)
+		self.assertEqual(ledger.get_cart_count(SupplyType.FOOD), 0)
+		self.assertIsNone(self.food.store)
+
+		self.store.add_stock(SupplyType.MASK)
+		self.assertEqual(ledger.get_stockroom_count(SupplyType.MASK), 1)
+
+	# Tests that a supply picked off a shelf and dropped by the player
+	# is no longer counted in the carts
+	def test_ledger_drop(self):
+		ledger = self.store.ledger
+		player = Player()
+
+		self.food.last_interaction = -1000
+		self.food.handle_interaction(player, [])
+		self.assertIs(player.item_being_carried, self.food)
+		self.assertEqual(ledger.get_shelf_count(SupplyType.FOOD), 0)
+		self.assertEqual(ledger.get_cart_count(SupplyType.FOOD), 1)
+
+		self.food.last_interaction = -1000
+		self.food.handle_interaction(player, [])
+		self.assertIsNone(player.item_being_carried)
+		self.assertEqual(ledger.get_cart_count(SupplyType.FOOD), 0)
+		self.assertIsNone(self.food.store)
+
+		# Removing the dropped supply does not count it out again
+		Entities().remove_item(self.food)
+		self.assertEqual(ledger.get_cart_count(SupplyType.FOOD), 0)
+
+	# Tests that every supply type is placed in the aisles of one type
+	def test_supply_aisles(self):
+		self.assertEqual(AisleType.get_supply_types(AisleType.GROCERIES),
+			[SupplyType.FOOD])
+
+		for supply_type in range(len(SupplyType.supply_strs)):
+			self.assertIn(supply_type, AisleType.get_supply_types(
+				AisleType.supply_aisles[supply_type]))
+
+	# Tests that supply types are taken out of the stockroom in turn
+	def test_take_stock(self):
+		self.store.add_stock(SupplyType.SOAP)
+		self.store.add_stock(SupplyType.FOOD)
+		self.store.add_stock(SupplyType.FOOD)
+
+		self.assertEqual(self.store.take_stock(), SupplyType.FOOD)
+		self.assertEqual(self.store.take_stock(), SupplyType.SOAP)
+
+		# Put back supply is not taken before the other types
+		self.store.return_stock(SupplyType.SOAP)
+		self.assertEqual(self.store.take_stock(), SupplyType.FOOD)
+		self.assertEqual(self.store.take_stock(), SupplyType.SOAP)
+		self.assertIsNone(self.store.take_stock())
+		self.assertEqual(self.store.get_stock_size(), 0)
+
+		# Supplies taken out are counted until they are placed
+		ledger = self.store.ledger
+		self.assertEqual(ledger.get_stocking_count(SupplyType.FOOD), 2)
+		self.assertEqual(ledger.get_stocking_count(SupplyType.SOAP), 1)
+
+		self.store.place_stock(Supply(0, 0, SupplyKind(SupplyType.FOOD, '',
+			None)), self.right_aisle, 0)
+		self.assertEqual(ledger.get_stocking_count(SupplyType.FOOD), 1)
+		self.assertEqual(ledger.get_shelf_count(SupplyType.FOOD), 2)
+
+	# Tests that the contents of a shopping cart are counted in the carts
+	# of its store until the cart is pushed out of the store
+	def test_ledger_shopping_cart(self):
+		ledger = self.store.ledger
+		player = Player()
+		shopping_cart = ShoppingCart(100, 800, None)
+		shopping_cart.store = self.store
+
+		self.food.last_interaction = -1000
+		self.food.handle_interaction(player, [])
+		shopping_cart.last_interaction = -1000
+		shopping_cart.handle_interaction(player, [])
+		self.assertEqual(shopping_cart.items.get_quantity(SupplyType.FOOD), 1)
+		self.assertEqual(ledger.get_cart_count(SupplyType.FOOD), 1)
+
+		# Pushed out of the bottom of the store
+		player.x = 100
+		player.y = 1100
+		player.running = True
+		player.x_velocity = 0
+		player.y_velocity = player.speed
+		shopping_cart.last_moved = -1000
+		shopping_cart.handle_collision(player)
+		self.assertEqual(ledger.get_cart_count(SupplyType.FOOD), 0)
+		self.assertIsNone(shopping_cart.store)
 
 class PetTests(unittest.TestCase):
 	pass
 
 class ShopperTests(unittest.TestCase):
-	pass
+	# Tests that shoppers start at the entrance and run the entry hook
+	# of their state
+	def test_set_state(self):
+		shopper = Shopper(100, 0, 'Shopper', None)
+		self.assertEqual(shopper.get_state(), 'At entrance')
+
+		shopper.set_state(ShopperState.ITEM)
+		self.assertEqual(shopper.aisle_center, 100)
+
+		# Removed shoppers are in no state
+		Entities().remove_character(shopper)
+		self.assertEqual(shopper.state, None)
+
+	# Tests that shoppers in the same state are updated as a group
+	# that looks up the shelves once for all of them
+	def test_state_group(self):
+		store = GroceryStore(0, 0, 1000, 1000, None, None)
+		aisle = Aisle(100, 100, 50, 500, None)
+		store.add_aisle(aisle)
+		aisle.create_slots(5, 100)
+		store.add_supply(Supply(0, 0, SupplyKind(SupplyType.FOOD, '', None)),
+			aisle, 4)
+
+		entities = Entities()
+		shoppers = []
+		for y in (700, 510, 300):
+			shopper = Shopper(100, y, 'Shopper', None)
+			shopper.store = store
+			shopper.target_item = SupplyType.FOOD
+			shopper.set_state(ShopperState.AISLE)
+			shoppers.append(shopper)
+
+		group = StateGroup(entities, shoppers[0])
+		group.characters += shoppers[1:]
+		group.update()
+
+		# Below the supply, at the supply and past all supplies
+		self.assertEqual([shopper.state for shopper in shoppers],
+			[ShopperState.AISLE, ShopperState.ITEM, ShopperState.AISLE_END])
+		self.assertEqual(list(group.supplies), [(aisle, SupplyType.FOOD)])
+
+		for shopper in shoppers:
+			entities.remove_character(shopper)
+
+	# Tests that a reused shopper is not drawn between the position it was
+	# removed at and the position it is reused at
+	def test_reset(self):
+		entities = Entities()
+		shopper = Shopper(0, 0, 'Shopper', None)
+		shopper.x_velocity = 1000
+		shopper.last_moved -= 100
+		shopper.update_position()
+		self.assertNotEqual(shopper.interpolation_offset(0.0), (0.0, 0.0))
+		entities.remove_character(shopper)
+
+		shopper.reset(500, 500, 'Shopper', None)
+		self.assertEqual(shopper.interpolation_offset(0.0), (0.0, 0.0))
+		entities.remove_character(shopper)
 
 class StockerTests(unittest.TestCase):
-	pass
+	# Tests that stockers start at the stockroom
+	def test_set_state(self):
+		stocker = Stocker(0, 0, 'Stocker', None)
+		self.assertEqual(stocker.get_state(), 'At stockroom')
+
+		Entities().remove_character(stocker)
+		self.assertEqual(stocker.state, None)
 
 class PlayerTests(unittest.TestCase):
-	pass
+	# Tests that the collision rectangle is the one check_collision() uses,
+	# the vehicle's while driving
+	def test_collision_rect(self):
+		player = Player()
+		player.x = 500
+		player.y = 500
+		x, y, width, height = player.get_collision_rect()
+
+		self.assertEqual((x, y, width, height), (500, 500 - player.height,
+			player.width, Player.render_height))
+		item = Item(x + width - 1, y + height - 1, 10, 10, None)
+		self.assertTrue(player.check_collision(item))
+		item = Item(x + width, y, 10, 10, None)
+		self.assertFalse(player.check_collision(item))
+
+		vehicle = Vehicle(0, 0, None)
+		vehicle.drive(player)
+		player.vehicle = vehicle
+		self.assertEqual(player.get_collision_rect(),
+			(500, 500, vehicle.width, vehicle.height))
 
 if __name__ == '__main__':
 	unittest.main()
\ No newline at end of file
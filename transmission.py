@@ -0,0 +1,107 @@
+import math, random
+
+# Spreads the infection between civilians that are close to each other
+# Civilians are bucketed in a grid of cells as large as the contact radius,
+# so susceptible civilians are only compared with the infected civilians
+# in the 3 x 3 cells around their cell instead of with every civilian
+class Transmission:
+	# Default values:
+
+	# Distance between the centers of two civilians
+	# within which the infection can spread
+	default_contact_radius = 100 # px
+
+	# Chance that an infected civilian infects a susceptible one
+	# for each second they are in contact, without masks
+	transmission_rate = 2 # % / s
+
+	# Factors of the chance when the infected civilian
+	# or the susceptible civilian is wearing a mask
+	source_mask_factor = 0.3
+	target_mask_factor = 0.5
+
+	def __init__(self, contact_radius = default_contact_radius):
+		self.contact_radius = contact_radius
+
+		# Number of civilians infected by other civilians so far
+		self.num_transmissions = 0
+
+	# Returns the chance that the infected civilian infects the susceptible
+	# civilian over the time they are in contact: %
+	# Parameters: whether each of them is wearing a mask,
+	# and the time in contact: ms
+	def get_chance(self, source_mask, target_mask, time):
+		rate = Transmission.transmission_rate / 100.0
+		if source_mask:
+			rate *= Transmission.source_mask_factor
+		if target_mask:
+			rate *= Transmission.target_mask_factor
+
+		# Chance of at least one transmission over the whole time,
+		# so contacts spread the infection more the longer they last
+		return (1.0 - math.exp(-rate * time / 1000.0)) * 100
+
+	# Lets each infected civilian infect the susceptible civilians
+	# within the contact radius
+	# Civilians infected during the spread do not infect others until
+	# the next one
+	# Parameters: civilians and the time they were in contact: ms
+	# Returns list of the civilians that became infected
+	def spread(self, civilians, time):
+		radius = self.contact_radius
+		squared_radius = radius ** 2
+
+		# Centers and masks of the infected civilians in each cell,
+		# and the susceptible civilians in each cell
+		# <(int, int), [(float, float, bool)]>, <(int, int), [Civilian]>
+		sources = {}
+		targets = {}
+		for civilian in civilians:
+			center_x = civilian.x + civilian.width / 2
+			center_y = civilian.y + civilian.height / 2
+			cell = (int(center_x // radius), int(center_y // radius))
+
+			if civilian.infected:
+				sources.setdefault(cell, []).append(
+					(center_x, center_y, civilian.wearing_mask))
+			else:
+				targets.setdefault(cell, []).append(civilian)
+
+		if len(sources) == 0:
+			return []
+
+		# Chance for each combination of masks
+		# <(bool, bool), float>
+		chances = {}
+		for source_mask in (False, True):
+			for target_mask in (False, True):
+				chances[(source_mask, target_mask)] = self.get_chance(
+					source_mask, target_mask, time)
+
+		newly_infected = []
+		for (column, row), cell_targets in targets.items():
+			# Infected civilians that can be in contact with the cell
+			nearby_sources = []
+			for neighbor_column in range(column - 1, column + 2):
+				for neighbor_row in range(row - 1, row + 2):
+					cell_sources = sources.get((neighbor_column, neighbor_row))
+					if cell_sources != None:
+						nearby_sources += cell_sources
+
+			if len(nearby_sources) == 0:
+				continue
+
+			for civilian in cell_targets:
+				center_x = civilian.x + civilian.width / 2
+				center_y = civilian.y + civilian.height / 2
+
+				for source_x, source_y, source_mask in nearby_sources:
+					if (source_x - center_x) ** 2 + (source_y - center_y) ** 2\
+						< squared_radius and random.random() * 100\
+						< chances[(source_mask, civilian.wearing_mask)]:
+						civilian.infect()
+						newly_infected.append(civilian)
+						break
+
+		self.num_transmissions += len(newly_infected)
+		return newly_infected
@@ -8,7 +8,8 @@ from enums import TextureType, MapElementType
 
 class UserInterface:
 	# Initializes fonts and messages
-	def __init__(self, textures):
+	# Parameters: loaded textures and the simulation clock
+	def __init__(self, textures, clock):
 		# TO DO: implement panels later
 		self.panels = []
 
@@ -20,11 +21,11 @@ class UserInterface:
 		# Initialize message systems
 		self.middle_text = MiddleText()
 		self.info_text = InfoText()
-		self.message_stack = MessageStack()
+		self.message_stack = MessageStack(clock)
 
 		self.mini_map = MiniMap(textures.get(TextureType.MINI_MAP))
 
-		self.last_interaction = sdl2.SDL_GetTicks()
+		self.last_interaction = clock.get_ticks()
 
 	# Handles mouse and keyboard input
 	# Returns false if the user quits the game
@@ -120,6 +121,12 @@ class MiniMap:
 		self.x_scale = 0.0
 		self.y_scale = 0.0
 
+		# Rectangles of the roads and locations, which never move,
+		# so they are only calculated again if the screen size changes
+		self.road_rectangles = []
+		self.location_rectangles = []
+		self.static_rectangles_screen = None
+
 	def render(self, renderer, screen_width, screen_height,
 		entities, map_rectangle):
 
@@ -144,21 +151,41 @@ class MiniMap:
 			int(self.size)))
 
 	def render_roads(self, renderer, screen_width, screen_height, entities):
+		self.update_static_rectangles(screen_width, screen_height, entities)
+
 		sdl2.SDL_SetRenderDrawColor(renderer, 48, 48, 48, 255)
+		for rectangle in self.road_rectangles:
+			sdl2.SDL_RenderFillRect(renderer, rectangle)
+
+	def render_locations(self, renderer, screen_width, screen_height, entities):
+		self.update_static_rectangles(screen_width, screen_height, entities)
+
+		sdl2.SDL_SetRenderDrawColor(renderer, 80, 80, 80, 255)
+		for rectangle in self.location_rectangles:
+			sdl2.SDL_RenderFillRect(renderer, rectangle)
+
+	# Calculates the rectangles of the roads and locations
+	# if the screen size changed since they were last calculated
+	def update_static_rectangles(self, screen_width, screen_height, entities):
+		screen = (screen_width, screen_height, self.x_scale, self.y_scale)
+		if screen == self.static_rectangles_screen:
+			return
+		self.static_rectangles_screen = screen
+
+		self.road_rectangles = []
 		for road in entities.map_elements:
 			if road.type != MapElementType.ROAD:
 				continue
 
-			sdl2.SDL_RenderFillRect(renderer, sdl2.SDL_Rect(
+			self.road_rectangles.append(sdl2.SDL_Rect(
 				self.get_adjusted_x(road, screen_width),
 				self.get_adjusted_y(road, screen_height),
 				int(road.width * self.x_scale),
 				int(road.height * self.y_scale)))
 
-	def render_locations(self, renderer, screen_width, screen_height, entities):
-		sdl2.SDL_SetRenderDrawColor(renderer, 80, 80, 80, 255)
+		self.location_rectangles = []
 		for location in entities.locations:
-			sdl2.SDL_RenderFillRect(renderer, sdl2.SDL_Rect(
+			self.location_rectangles.append(sdl2.SDL_Rect(
 				self.get_adjusted_x(location, screen_width),
 				self.get_adjusted_y(location, screen_height),
 				int(location.width * self.x_scale),
@@ -780,9 +807,9 @@ class InfoText(TextDisplayer):
 			return str(hours) + ':' + remaining_minutes + ' AM'
 
 class TimeStampedMessage:
-	def __init__(self, text):
+	def __init__(self, text, time):
 		self.text = text
-		self.time = sdl2.SDL_GetTicks()
+		self.time = time
 
 class MessageStack(TextDisplayer):
 	# Time the message stays in the stack
@@ -794,10 +821,13 @@ class MessageStack(TextDisplayer):
 	# Y-spacing in between messages
 	spacing = 25 # px
 
-	def __init__(self):
+	def __init__(self, clock):
 		self.messages = []
 		self.text_color = sdl2.SDL_Color(0, 0, 0) # black
 
+		# Simulation clock used to time stamp and expire messages
+		self.clock = clock
+
 	# Renders messages by rows, with the new message on the top
 	def render(self, renderer, font, screen_height):
 		self.remove_expired_messages()
@@ -824,15 +854,16 @@ class MessageStack(TextDisplayer):
 			row += 1
 
 	# Removes messages that have been displayed for the duration
+	# Messages are inserted in time order, so only the oldest one
+	# can have expired first
 	def remove_expired_messages(self):
-		for message in self.messages:
-			if MessageStack.message_duration < sdl2.SDL_GetTicks()\
-			- message.time:
-				self.messages.remove(message)
-				# Only removes one message each frame
-				return
+		if len(self.messages) > 0 and MessageStack.message_duration\
+		< self.clock.get_ticks() - self.messages[0].time:
+			# Only removes one message each frame
+			self.messages.pop(0)
 
 	# Adds messages from list to the stack with the current time
 	def insert(self, list):
 		for message in list:
-			self.messages.append(TimeStampedMessage(message))
+			self.messages.append(TimeStampedMessage(message,
+				self.clock.get_ticks()))